@@ -9,11 +9,15 @@ Ejecutar con:
 La API estará disponible en http://localhost:5000/api/
 """
 
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, jsonify, request, send_file, send_from_directory
 from flask_cors import CORS
+from werkzeug.security import safe_join
 from routes.api import api_bp
+from routes.compresion import precomprimir_directorio, hay_variantes_pendientes, variante_en_disco
+import mimetypes
 import sys
 import os
+import threading
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
@@ -23,9 +27,36 @@ load_dotenv()
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, root_dir)
 
-# Configurar ruta de archivos estáticos (absoluta para mayor compatibilidad)
+from src.scraper import estado_upstream, estado_detalles, estadisticas_cache_parseo
+from src.utils import setup_logger
+from src.cache_compartido import estado_cache
+from routes.api import CLAVE_CACHE
+
+# Configurar ruta de archivos estáticos (absoluta para mayor compatibilidad).
+# Sin la ruta estática de Flask: serve_frontend sirve los archivos del build
+# con sus variantes pre-comprimidas
 static_folder_path = os.path.join(root_dir, 'frontend', 'dist')
-app = Flask(__name__, static_folder=static_folder_path, static_url_path='')
+app = Flask(__name__, static_folder=None)
+
+logger = setup_logger()
+
+
+def precomprimir_frontend():
+    """Genera las variantes .gz/.br del build que falten."""
+    try:
+        generadas = precomprimir_directorio(static_folder_path)
+        if generadas:
+            logger.info(f"Frontend: {generadas} archivos pre-comprimidos")
+    except OSError as e:
+        logger.warning(f"No se pudieron pre-comprimir los archivos del frontend: {e}")
+
+
+# Las variantes se generan en el build (Dockerfile, build.sh). Si faltan
+# (ej: en desarrollo) se generan en segundo plano, sin demorar el inicio;
+# mientras tanto los archivos se sirven sin comprimir
+if hay_variantes_pendientes(static_folder_path):
+    logger.warning("Frontend sin pre-comprimir: se generan las variantes en segundo plano")
+    threading.Thread(target=precomprimir_frontend, name='precompresion', daemon=True).start()
 
 # Configuración según ambiente
 FLASK_ENV = os.getenv('FLASK_ENV', 'development')
@@ -45,8 +76,9 @@ if FLASK_ENV == 'production':
 CORS(app, resources={
     r"/api/*": {
         "origins": cors_origins if cors_origins else ["*"],
-        "methods": ["GET"],
-        "allow_headers": ["Content-Type"]
+        "methods": ["GET", "POST"],  # POST: /api/estaciones/lote con cuerpo JSON
+        "allow_headers": ["Content-Type"],
+        "expose_headers": ["X-Data-Age", "ETag"]
     }
 })
 
@@ -65,7 +97,13 @@ def api_info():
             '/api/estaciones': 'Lista de estaciones con temperaturas',
             '/api/pronostico': 'Pronóstico general',
             '/api/estacion/<nombre>': 'Datos de una estación específica',
-            '/api/resumen': 'Resumen rápido del clima'
+            '/api/estaciones/cercanas?lat=&lon=&k=': 'Estaciones más cercanas a un punto',
+            '/api/estaciones/buscar?q=': 'Estaciones por nombre (sin acentos, tolera errores de tipeo)',
+            '/api/estaciones/lote?ids=&nombres=': 'Varias estaciones en una sola respuesta (también POST JSON)',
+            '/api/estaciones/area?lat_min=&lon_min=&lat_max=&lon_max=': 'Estaciones dentro de un rectángulo',
+            '/api/resumen': 'Resumen rápido del clima',
+            '/api/dashboard': 'Pronóstico, estaciones y resumen en una sola respuesta',
+            '/api/mapa/temperatura?resolucion=&formato=': 'Grilla de temperatura interpolada (json o binario)'
         },
         'fuente': 'https://clima.sanluis.gob.ar/'
     })
@@ -74,7 +112,13 @@ def api_info():
 @app.route('/health')
 def health():
     """Endpoint de health check."""
-    return jsonify({'status': 'ok'})
+    return jsonify({
+        'status': 'ok',
+        'upstream': estado_upstream(),
+        'upstream_detalles': estado_detalles(),
+        'cache_parseo': estadisticas_cache_parseo(),
+        'cache_api': estado_cache(CLAVE_CACHE)
+    })
 
 # Servir archivos estáticos del frontend en producción
 # Esta ruta debe ir al final para capturar todas las rutas no-API
@@ -87,23 +131,43 @@ def serve_frontend(path):
         return jsonify({'error': 'Not found'}), 404
     
     # Verificar que el directorio de archivos estáticos existe
-    if not app.static_folder or not os.path.exists(app.static_folder):
+    if not os.path.exists(static_folder_path):
         return jsonify({
             'error': 'Frontend no construido',
             'message': 'Ejecuta el build del frontend primero'
         }), 503
     
     # Servir archivo específico si existe
-    if path and os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
+    if path and os.path.isfile(os.path.join(static_folder_path, path)):
+        return enviar_estatico(path)
     
     # Servir index.html para todas las demás rutas (SPA routing)
-    if os.path.exists(os.path.join(app.static_folder, 'index.html')):
-        return send_from_directory(app.static_folder, 'index.html')
+    if os.path.exists(os.path.join(static_folder_path, 'index.html')):
+        return enviar_estatico('index.html')
     
     return jsonify({'error': 'Frontend no encontrado'}), 404
 
 
+def enviar_estatico(path):
+    """Envía un archivo del build, usando su versión pre-comprimida si el cliente la acepta."""
+    ruta = safe_join(static_folder_path, path)
+    if ruta is None:
+        return jsonify({'error': 'Not found'}), 404
+    
+    variante, codificacion = variante_en_disco(ruta, request.accept_encodings)
+    if codificacion is None:
+        return send_from_directory(static_folder_path, path)
+    
+    response = send_file(
+        variante,
+        mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream',
+        conditional=True
+    )
+    response.headers['Content-Encoding'] = codificacion
+    response.vary.add('Accept-Encoding')
+    return response
+
+
 if __name__ == '__main__':
     print("\n🌤️  Clima San Luis - API Backend")
     print("=" * 40)
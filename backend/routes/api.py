@@ -1,32 +1,457 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, current_app, jsonify, g, request
+import base64
+import binascii
+import hashlib
+import math
 import sys
 import os
-import time
+import threading
+from collections import OrderedDict
 
 # Agregar el directorio raíz al path para importar módulos existentes
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from src.scraper import obtener_clima, buscar_estacion
+from src import cache_compartido
+from src.utils import sin_espera
+from src.indices import indices_de, CAMPOS_ESTACION
+from src.interpolacion import (
+    numpy_disponible, grilla_a_json, grilla_a_binario,
+    ajustar_resolucion, RESOLUCION_POR_DEFECTO, RESOLUCION_MINIMA, RESOLUCION_MAXIMA
+)
+from config.settings import (
+    CACHE_LEASE, CACHE_TTL_SOFT, CACHE_TTL_HARD, CACHE_REFRESH_INTERVAL, REQUEST_DEADLINE_API
+)
+from .compresion import variantes, elegir_codificacion
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
-# Cache simple para no hacer demasiadas peticiones
-_cache = {
-    'data': None,
-    'timestamp': 0
-}
-CACHE_DURATION = 60  # segundos
+# Los datos se comparten entre todos los workers de gunicorn a través de
+# src/cache_compartido: un solo proceso renueva y los demás leen esa versión.
+# Un hilo por worker los renueva antes de que venza el TTL blando, así que
+# los requests no esperan al sitio salvo que el dato supere el TTL duro, y
+# aun así como mucho REQUEST_DEADLINE_API segundos.
+CLAVE_CACHE = 'clima'
+
+
+def _obtener_clima_sin_espera():
+    """
+    obtener_clima para cuando un request tiene que renovar: un solo intento
+    por descarga y REQUEST_DEADLINE_API segundos en total; si falla se usa
+    el respaldo. Los reintentos con backoff los hace el renovador.
+    """
+    with sin_espera(REQUEST_DEADLINE_API):
+        return obtener_clima()
 
 
 def get_clima_data():
-    """Obtiene datos del clima con cache simple."""
-    current_time = time.time()
+    """Obtiene datos del clima desde la cache compartida entre workers."""
+    cache_compartido.iniciar_renovador(
+        CLAVE_CACHE, obtener_clima, CACHE_TTL_SOFT, CACHE_LEASE, CACHE_REFRESH_INTERVAL
+    )
+    
+    datos, edad = cache_compartido.obtener_o_renovar(
+        CLAVE_CACHE, _obtener_clima_sin_espera, CACHE_TTL_HARD, CACHE_LEASE
+    )
+    g.edad_datos = edad
+    return datos
+
+
+# Cuerpos ya serializados del snapshot actual, por vista. El snapshot que
+# retorna la cache compartida es el mismo objeto mientras no cambie la
+# versión, así que se compara por identidad. Las vistas fijas se guardan
+# todas; las filtradas (fields, limit, filtros) en una LRU aparte.
+_cuerpos = {'clima': None, 'vistas': {}, 'filtradas': OrderedDict()}
+_lock_cuerpos = threading.Lock()
+
+# Vistas filtradas distintas que se guardan por snapshot
+MAX_VISTAS_FILTRADAS = 64
+
+
+def cuerpo_de_vista(clima, vista, construir, filtrada=False):
+    """
+    Retorna el cuerpo de una vista para un snapshot, serializándolo solo la
+    primera vez.
+    
+    Args:
+        clima: Snapshot retornado por get_clima_data
+        vista: Nombre de la vista (ej: 'estaciones')
+        construir: Función que recibe el snapshot y retorna (datos, status);
+            si datos ya son bytes se sirven tal cual, como binario
+        filtrada: Vista con parámetros del cliente: se guarda en la LRU de
+            filtradas y solo se comprime con gzip rápido
+            
+    Returns:
+        dict: 'contenido' (bytes), 'variantes' (codificación -> bytes,
+            comprimidas una sola vez), 'status', 'etag' y 'mimetype'
+    """
+    guardadas = 'filtradas' if filtrada else 'vistas'
+    with _lock_cuerpos:
+        if _cuerpos['clima'] is clima:
+            cuerpo = _cuerpos[guardadas].get(vista)
+            if cuerpo is not None:
+                if filtrada:
+                    _cuerpos['filtradas'].move_to_end(vista)
+                return cuerpo
+    
+    datos, status = construir(clima)
+    if isinstance(datos, bytes):
+        contenido, mimetype = datos, 'application/octet-stream'
+    else:
+        contenido, mimetype = current_app.json.dumps(datos).encode('utf-8'), 'application/json'
+    cuerpo = {
+        'contenido': contenido,
+        'variantes': variantes(contenido, rapido=filtrada) if status == 200 else {'identity': contenido},
+        'status': status,
+        'mimetype': mimetype,
+        # ETag fuerte: depende solo del contenido, igual en todos los workers
+        'etag': hashlib.sha256(contenido).hexdigest()[:32]
+    }
+    
+    with _lock_cuerpos:
+        if _cuerpos['clima'] is not clima:
+            _cuerpos['clima'] = clima
+            _cuerpos['vistas'] = {}
+            _cuerpos['filtradas'] = OrderedDict()
+        _cuerpos[guardadas][vista] = cuerpo
+        if filtrada:
+            _cuerpos['filtradas'].move_to_end(vista)
+            while len(_cuerpos['filtradas']) > MAX_VISTAS_FILTRADAS:
+                _cuerpos['filtradas'].popitem(last=False)
+    
+    return cuerpo
+
+
+def responder_vista(vista, construir, filtrada=False):
+    """
+    Responde una vista del snapshot actual con ETag, o 304 si el cliente ya
+    tiene esa versión (If-None-Match). El cuerpo va comprimido con gzip o
+    brotli si el cliente lo acepta.
+    
+    Args:
+        vista: Nombre de la vista
+        construir: Función que recibe el snapshot y retorna (datos, status)
+        filtrada: Si la vista depende de parámetros del cliente
+        
+    Returns:
+        Response: Cuerpo pre-serializado o 304 sin cuerpo
+    """
+    cuerpo = cuerpo_de_vista(get_clima_data(), vista, construir, filtrada)
+    
+    if cuerpo['status'] != 200:
+        return Response(cuerpo['contenido'], status=cuerpo['status'], mimetype=cuerpo['mimetype'])
+    
+    # Cada codificación es una representación distinta: su propio ETag
+    codificacion = elegir_codificacion(request.accept_encodings, cuerpo['variantes'])
+    etag = cuerpo['etag'] if codificacion == 'identity' else f"{cuerpo['etag']}-{codificacion}"
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(cuerpo['variantes'][codificacion], mimetype=cuerpo['mimetype'])
+        if codificacion != 'identity':
+            response.headers['Content-Encoding'] = codificacion
+    
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    # El navegador revalida siempre: si el snapshot no cambió recibe un 304
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@api_bp.after_request
+def agregar_edad_datos(response):
+    """Informa la antigüedad de los datos servidos (segundos) en X-Data-Age."""
+    edad = g.get('edad_datos')
+    if edad is not None:
+        response.headers['X-Data-Age'] = str(int(edad))
+    return response
+
+
+# Máximo de estaciones por página (limit=)
+MAX_LIMITE = 500
+
+# Secciones de /api/clima que se pueden pedir con fields=
+SECCIONES_CLIMA = (
+    'pronostico_general', 'estaciones', 'exito', 'error', 'usando_cache', 'timestamp_guardado'
+)
+
+# Rango aceptado en temp_min / temp_max (°C)
+TEMPERATURA_LIMITE = 60
+
+
+def _leer_consulta(secciones=False):
+    """
+    Lee de la query los campos, filtros y paginación de estaciones.
+    
+    fields= lista campos de estación (ej: nombre,temperatura); con
+    secciones=True (para /api/clima) también acepta secciones del snapshot
+    y campos de estación como 'estaciones.nombre'.
+    
+    Args:
+        secciones: Si se aceptan secciones de /api/clima en fields
+        
+    Returns:
+        dict: Consulta normalizada; vacío si no hay ningún parámetro
+        
+    Raises:
+        ValueError: Si algún parámetro es inválido
+    """
+    args = request.args
+    consulta = {}
+    
+    if args.get('fields'):
+        campos, pedidas = [], []
+        for campo in (c.strip() for c in args['fields'].split(',')):
+            if not campo:
+                continue
+            if secciones and campo.startswith('estaciones.'):
+                campo = campo[len('estaciones.'):]
+            elif secciones:
+                if campo not in SECCIONES_CLIMA:
+                    raise ValueError(f"Sección desconocida en fields: '{campo}'")
+                pedidas.append(campo)
+                continue
+            if campo not in CAMPOS_ESTACION:
+                raise ValueError(f"Campo desconocido en fields: '{campo}'")
+            campos.append(campo)
+        
+        if campos:
+            consulta['campos'] = tuple(dict.fromkeys(campos))
+        if secciones:
+            if campos and 'estaciones' not in pedidas:
+                pedidas.append('estaciones')
+            consulta['secciones'] = tuple(dict.fromkeys(pedidas))
+    
+    # Las temperaturas vienen con un decimal: se redondea hacia adentro del
+    # rango (sin cambiar el resultado) para que la clave de la vista no
+    # dependa de decimales de más
+    for nombre, redondear in (('temp_min', math.ceil), ('temp_max', math.floor)):
+        if nombre in args:
+            valor = args.get(nombre, type=float)
+            if valor is None or not -TEMPERATURA_LIMITE <= valor <= TEMPERATURA_LIMITE:
+                raise ValueError(
+                    f"Parámetro '{nombre}' inválido (-{TEMPERATURA_LIMITE} a {TEMPERATURA_LIMITE})"
+                )
+            consulta[nombre] = redondear(round(valor * 10, 6)) / 10
+    
+    if 'con_lluvia' in args:
+        valor = args['con_lluvia'].lower()
+        if valor not in ('1', 'true', '0', 'false'):
+            raise ValueError("Parámetro 'con_lluvia' inválido (usar 1 o 0)")
+        consulta['con_lluvia'] = valor in ('1', 'true')
+    
+    if 'limit' in args:
+        limite = args.get('limit', type=int)
+        if limite is None or not 1 <= limite <= MAX_LIMITE:
+            raise ValueError(f"Parámetro 'limit' inválido (1 a {MAX_LIMITE})")
+        consulta['limite'] = limite
     
-    if _cache['data'] is None or (current_time - _cache['timestamp']) > CACHE_DURATION:
-        _cache['data'] = obtener_clima()
-        _cache['timestamp'] = current_time
+    if 'cursor' in args:
+        consulta['cursor'] = _decodificar_cursor(args['cursor'])
+    
+    return consulta
+
+
+def _codificar_cursor(huella, posicion):
+    """Cursor opaco: huella de las estaciones del snapshot y posición siguiente."""
+    return base64.urlsafe_b64encode(f"{huella}:{posicion}".encode('ascii')).decode('ascii').rstrip('=')
+
+
+def _decodificar_cursor(cursor):
+    """
+    Decodifica un cursor de paginación.
+    
+    Returns:
+        tuple: (huella, posición)
+        
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        huella, posicion = texto.split(':')
+        posicion = int(posicion)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError("Parámetro 'cursor' inválido")
+    
+    if posicion < 0:
+        raise ValueError("Parámetro 'cursor' inválido")
+    return huella, posicion
+
+
+def _cursor_vencido(clima, consulta):
+    """Si el cursor es de otro snapshot (las estaciones cambiaron desde la página anterior)."""
+    cursor = consulta.get('cursor') if consulta else None
+    return cursor is not None and cursor[0] != indices_de(clima).huella
+
+
+# Respuesta para un cursor de un snapshot anterior: la posición ya no
+# corresponde a las mismas estaciones, hay que volver a la primera página
+CURSOR_VENCIDO = {
+    'exito': False,
+    'error': 'Los datos cambiaron desde la página anterior: volver a pedir sin cursor'
+}
+
+
+def _clave_consulta(consulta):
+    """Sufijo de la vista para una consulta: igual para los mismos parámetros en cualquier orden."""
+    if not consulta:
+        return ''
+    return '?' + '&'.join(f"{k}={consulta[k]}" for k in sorted(consulta))
+
+
+def _estaciones_filtradas(clima, consulta, orden):
+    """
+    Aplica filtros, paginación y campos sobre los índices del snapshot.
+    
+    Returns:
+        tuple: (estaciones de la página, total que cumple los filtros,
+            cursor de la página siguiente o None)
+    """
+    indices = indices_de(clima)
+    posiciones = indices.filtrar(
+        consulta.get('temp_min'), consulta.get('temp_max'), consulta.get('con_lluvia'), orden
+    )
+    
+    total = len(posiciones)
+    inicio = min(consulta['cursor'][1], total) if 'cursor' in consulta else 0
+    limite = consulta.get('limite')
+    fin = total if limite is None else min(inicio + limite, total)
+    campos = consulta.get('campos')
+    
+    estaciones = []
+    for i in posiciones[inicio:fin]:
+        estacion = indices.estaciones[i]
+        if campos is not None:
+            estacion = {c: estacion[c] for c in campos if c in estacion}
+        estaciones.append(estacion)
+    
+    return estaciones, total, (_codificar_cursor(indices.huella, fin) if fin < total else None)
+
+
+def _vista_clima(clima, consulta=None):
+    if not clima['exito']:
+        return {
+            'exito': False,
+            'error': clima['error']
+        }, 500
+    
+    if not consulta:
+        return clima, 200
+    
+    if _cursor_vencido(clima, consulta):
+        return CURSOR_VENCIDO, 410
+    
+    secciones = consulta.get('secciones') or tuple(clima)
+    resultado = {}
+    for clave, valor in clima.items():
+        if clave != 'exito' and clave not in secciones:
+            continue
+        if clave == 'estaciones':
+            valor, total, siguiente = _estaciones_filtradas(clima, consulta, 'original')
+            resultado['total_estaciones'] = total
+            resultado['siguiente_cursor'] = siguiente
+        resultado[clave] = valor
+    
+    return resultado, 200
+
+
+def _vista_estaciones(clima, consulta=None):
+    if not clima['exito']:
+        return {
+            'exito': False,
+            'error': clima['error'],
+            'estaciones': []
+        }, 500
+    
+    if _cursor_vencido(clima, consulta):
+        return CURSOR_VENCIDO, 410
+    
+    if consulta:
+        estaciones, total, siguiente = _estaciones_filtradas(clima, consulta, 'temperatura')
+        return {
+            'exito': True,
+            'total': total,
+            'estaciones': estaciones,
+            'siguiente_cursor': siguiente
+        }, 200
+    
+    # Filtrar estaciones con temperatura válida
+    estaciones = [
+        e for e in clima['estaciones'] 
+        if e.get('temperatura') is not None
+    ]
+    
+    # Ordenar por temperatura descendente
+    estaciones.sort(key=lambda x: x['temperatura'], reverse=True)
+    
+    return {
+        'exito': True,
+        'total': len(estaciones),
+        'estaciones': estaciones
+    }, 200
+
+
+def _vista_pronostico(clima):
+    if not clima['exito']:
+        return {
+            'exito': False,
+            'error': clima['error']
+        }, 500
+    
+    pronostico = clima.get('pronostico_general', {})
+    
+    return {
+        'exito': True,
+        'estado_actual': pronostico.get('estado_actual'),
+        'pronostico_hoy': pronostico.get('pronostico_hoy'),
+        'pronostico_extendido': pronostico.get('pronostico_extendido', []),
+        'alerta_meteorologica': pronostico.get('alerta_meteorologica'),
+        'informe_especial': pronostico.get('informe_especial')
+    }, 200
+
+
+def _vista_resumen(clima):
+    if not clima['exito']:
+        return {
+            'exito': False,
+            'error': clima['error']
+        }, 500
+    
+    pronostico = clima.get('pronostico_general', {})
+    hoy = pronostico.get('pronostico_hoy', {})
+    estaciones = clima.get('estaciones', [])
+    
+    # Calcular estadísticas
+    temps = [e['temperatura'] for e in estaciones if e.get('temperatura') is not None]
+    
+    return {
+        'exito': True,
+        'temperatura_minima': hoy.get('temperatura_minima'),
+        'temperatura_maxima': hoy.get('temperatura_maxima'),
+        'temperatura_promedio': round(sum(temps) / len(temps), 1) if temps else None,
+        'temperatura_actual_max': max(temps) if temps else None,
+        'temperatura_actual_min': min(temps) if temps else None,
+        'total_estaciones': len(temps),
+        'hay_alerta': pronostico.get('alerta_meteorologica') is not None
+    }, 200
+
+
+def _vista_dashboard(clima):
+    if not clima['exito']:
+        return {
+            'exito': False,
+            'error': clima['error']
+        }, 500
     
-    return _cache['data']
+    # Las tres vistas del dashboard salen del mismo snapshot
+    return {
+        'exito': True,
+        'pronostico': _vista_pronostico(clima)[0],
+        'estaciones': _vista_estaciones(clima)[0],
+        'resumen': _vista_resumen(clima)[0]
+    }, 200
 
 
 @api_bp.route('/clima')
@@ -34,9 +459,96 @@ def get_clima():
     """
     Obtiene todos los datos del clima.
     
+    Query params (opcionales):
+        fields: Secciones y campos de estación (ej:
+            estaciones.nombre,estaciones.temperatura)
+        temp_min, temp_max, con_lluvia, limit, cursor: Filtros y
+            paginación de las estaciones, como en /api/estaciones
+            
     Returns:
         JSON con pronóstico general, estaciones y estado
     """
+    try:
+        consulta = _leer_consulta(secciones=True)
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
+    
+    return responder_vista(
+        'clima' + _clave_consulta(consulta), lambda clima: _vista_clima(clima, consulta),
+        filtrada=bool(consulta)
+    )
+
+
+@api_bp.route('/estaciones')
+def get_estaciones():
+    """
+    Obtiene lista de estaciones con temperaturas.
+    
+    Query params (opcionales):
+        fields: Campos de cada estación (ej: nombre,temperatura)
+        temp_min, temp_max: Rango de temperatura, inclusive
+        con_lluvia: 1 (solo con precipitación) o 0 (solo sin)
+        limit: Estaciones por página (máximo MAX_LIMITE)
+        cursor: 'siguiente_cursor' de la página anterior (opaco; si las
+            estaciones cambiaron desde entonces se responde 410)
+            
+    Returns:
+        JSON con lista de estaciones ordenadas por temperatura; con
+        parámetros, 'total' cuenta las que cumplen los filtros
+    """
+    try:
+        consulta = _leer_consulta()
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
+    
+    return responder_vista(
+        'estaciones' + _clave_consulta(consulta), lambda clima: _vista_estaciones(clima, consulta),
+        filtrada=bool(consulta)
+    )
+
+
+@api_bp.route('/pronostico')
+def get_pronostico():
+    """
+    Obtiene el pronóstico general.
+    
+    Returns:
+        JSON con pronóstico actual, de hoy y extendido
+    """
+    return responder_vista('pronostico', _vista_pronostico)
+
+
+def _parametro_float(nombre, minimo, maximo):
+    """Lee un parámetro numérico de la query; lanza ValueError si falta o es inválido."""
+    valor = request.args.get(nombre, type=float)
+    if valor is None or not minimo <= valor <= maximo:
+        raise ValueError(f"Parámetro '{nombre}' inválido o ausente")
+    return valor
+
+
+@api_bp.route('/estaciones/cercanas')
+def get_estaciones_cercanas():
+    """
+    Obtiene las estaciones más cercanas a un punto.
+    
+    Query params:
+        lat, lon: Coordenadas del punto (ej: las del GPS del cliente)
+        k: Cantidad de estaciones (por defecto 5, máximo 50)
+        radio_km: Distancia máxima opcional
+        
+    Returns:
+        JSON con las estaciones, de la más cercana a la más lejana, cada
+        una con su 'distancia_km'
+    """
+    try:
+        lat = _parametro_float('lat', -90, 90)
+        lon = _parametro_float('lon', -180, 180)
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
+    
+    k = min(max(request.args.get('k', 5, type=int), 1), 50)
+    radio_km = request.args.get('radio_km', type=float)
+    
     clima = get_clima_data()
     
     if not clima['exito']:
@@ -45,34 +557,47 @@ def get_clima():
             'error': clima['error']
         }), 500
     
-    return jsonify(clima)
+    cercanas = indices_de(clima).espacial.cercanas(lat, lon, k, radio_km)
+    
+    return jsonify({
+        'exito': True,
+        'total': len(cercanas),
+        'estaciones': [
+            {**estacion, 'distancia_km': round(distancia, 2)}
+            for distancia, estacion in cercanas
+        ]
+    })
 
 
-@api_bp.route('/estaciones')
-def get_estaciones():
+@api_bp.route('/estaciones/area')
+def get_estaciones_area():
     """
-    Obtiene lista de estaciones con temperaturas.
+    Obtiene las estaciones dentro de un rectángulo de coordenadas.
     
+    Query params:
+        lat_min, lon_min: Esquina sudoeste
+        lat_max, lon_max: Esquina noreste
+        
     Returns:
-        JSON con lista de estaciones ordenadas por temperatura
+        JSON con las estaciones dentro del rectángulo
     """
+    try:
+        lat_min = _parametro_float('lat_min', -90, 90)
+        lon_min = _parametro_float('lon_min', -180, 180)
+        lat_max = _parametro_float('lat_max', -90, 90)
+        lon_max = _parametro_float('lon_max', -180, 180)
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
+    
     clima = get_clima_data()
     
     if not clima['exito']:
         return jsonify({
             'exito': False,
-            'error': clima['error'],
-            'estaciones': []
+            'error': clima['error']
         }), 500
     
-    # Filtrar estaciones con temperatura válida
-    estaciones = [
-        e for e in clima['estaciones'] 
-        if e.get('temperatura') is not None
-    ]
-    
-    # Ordenar por temperatura descendente
-    estaciones.sort(key=lambda x: x['temperatura'], reverse=True)
+    estaciones = indices_de(clima).espacial.en_rectangulo(lat_min, lon_min, lat_max, lon_max)
     
     return jsonify({
         'exito': True,
@@ -81,14 +606,25 @@ def get_estaciones():
     })
 
 
-@api_bp.route('/pronostico')
-def get_pronostico():
+@api_bp.route('/estaciones/buscar')
+def get_estaciones_buscar():
     """
-    Obtiene el pronóstico general.
+    Busca estaciones por nombre (sin acentos ni mayúsculas, con errores de tipeo).
     
+    Query params:
+        q: Nombre o parte del nombre
+        limit: Cantidad de resultados (por defecto 5, máximo 20)
+        
     Returns:
-        JSON con pronóstico actual, de hoy y extendido
+        JSON con las estaciones de la mejor coincidencia a la peor, cada
+        una con su 'puntaje' (0 a 1)
     """
+    consulta = request.args.get('q', '').strip()
+    if not consulta:
+        return jsonify({'exito': False, 'error': "Parámetro 'q' inválido o ausente"}), 400
+    
+    limite = min(max(request.args.get('limit', 5, type=int), 1), 20)
+    
     clima = get_clima_data()
     
     if not clima['exito']:
@@ -97,15 +633,91 @@ def get_pronostico():
             'error': clima['error']
         }), 500
     
-    pronostico = clima.get('pronostico_general', {})
+    resultados = indices_de(clima).nombres.buscar(consulta, limite)
     
     return jsonify({
         'exito': True,
-        'estado_actual': pronostico.get('estado_actual'),
-        'pronostico_hoy': pronostico.get('pronostico_hoy'),
-        'pronostico_extendido': pronostico.get('pronostico_extendido', []),
-        'alerta_meteorologica': pronostico.get('alerta_meteorologica'),
-        'informe_especial': pronostico.get('informe_especial')
+        'total': len(resultados),
+        'estaciones': [
+            {**estacion, 'puntaje': puntaje}
+            for puntaje, estacion in resultados
+        ]
+    })
+
+
+# Máximo de ids + nombres por pedido a /estaciones/lote
+MAX_LOTE = 100
+
+
+def _valor_json(nombre, valor):
+    """
+    Normaliza un elemento de una lista JSON a texto: los números enteros
+    (58 o 58.0) como '58', para que coincidan con los ids.
+    """
+    if isinstance(valor, str):
+        return valor.strip()
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        if isinstance(valor, float) and not valor.is_integer():
+            raise ValueError(f"'{nombre}' contiene un número no entero: {valor}")
+        return str(int(valor))
+    raise ValueError(f"'{nombre}' solo admite textos o números enteros")
+
+
+def _lista_parametro(nombre):
+    """Valores de un parámetro de lista: JSON (POST) o 'a,b' / repetido en la query."""
+    cuerpo = request.get_json(silent=True) if request.method == 'POST' else None
+    if isinstance(cuerpo, dict):
+        valores = cuerpo.get(nombre) or []
+        if not isinstance(valores, list):
+            raise ValueError(f"'{nombre}' debe ser una lista")
+        valores = [_valor_json(nombre, v) for v in valores]
+        return [v for v in valores if v]
+    
+    valores = []
+    for parametro in request.args.getlist(nombre):
+        valores.extend(v.strip() for v in parametro.split(',') if v.strip())
+    return valores
+
+
+@api_bp.route('/estaciones/lote', methods=['GET', 'POST'])
+def get_estaciones_lote():
+    """
+    Obtiene varias estaciones en una sola respuesta, todas del mismo snapshot.
+    
+    Query params (o cuerpo JSON en POST):
+        ids: Ids de estación (ej: ids=58,12)
+        nombres: Nombres de estación (ej: nombres=Merlo,Unión)
+        
+    Returns:
+        JSON con las estaciones encontradas, en el orden pedido, y las que
+        no se encontraron
+    """
+    try:
+        ids = _lista_parametro('ids')
+        nombres = _lista_parametro('nombres')
+    except ValueError as e:
+        return jsonify({'exito': False, 'error': str(e)}), 400
+    
+    if not ids and not nombres:
+        return jsonify({'exito': False, 'error': "Se requiere 'ids' o 'nombres'"}), 400
+    if len(ids) + len(nombres) > MAX_LOTE:
+        return jsonify({'exito': False, 'error': f'Máximo {MAX_LOTE} estaciones por pedido'}), 400
+    
+    clima = get_clima_data()
+    
+    if not clima['exito']:
+        return jsonify({
+            'exito': False,
+            'error': clima['error']
+        }), 500
+    
+    estaciones, no_encontradas = indices_de(clima).resolver_lote(ids, nombres)
+    
+    return jsonify({
+        'exito': True,
+        'total': len(estaciones),
+        'estaciones': estaciones,
+        'no_encontradas': no_encontradas
     })
 
 
@@ -128,7 +740,7 @@ def get_estacion(nombre):
             'error': clima['error']
         }), 500
     
-    estacion = buscar_estacion(nombre, clima['estaciones'])
+    estacion = buscar_estacion(nombre, clima['estaciones'], indices_de(clima).nombres)
     
     if estacion:
         return jsonify({
@@ -150,29 +762,74 @@ def get_resumen():
     Returns:
         JSON con datos resumidos
     """
-    clima = get_clima_data()
+    return responder_vista('resumen', _vista_resumen)
+
+
+@api_bp.route('/dashboard')
+def get_dashboard():
+    """
+    Obtiene en una sola respuesta los datos del dashboard.
     
+    Returns:
+        JSON con las vistas 'pronostico', 'estaciones' y 'resumen' (el
+        mismo contenido que sus endpoints), calculadas del mismo snapshot
+    """
+    return responder_vista('dashboard', _vista_dashboard)
+
+
+def _vista_mapa_temperatura(clima, resolucion, binario):
     if not clima['exito']:
-        return jsonify({
+        return {
             'exito': False,
             'error': clima['error']
-        }), 500
+        }, 500
     
-    pronostico = clima.get('pronostico_general', {})
-    hoy = pronostico.get('pronostico_hoy', {})
-    estaciones = clima.get('estaciones', [])
+    grilla = indices_de(clima).grilla_temperatura(resolucion)
+    if grilla is None:
+        return {
+            'exito': False,
+            'error': 'No hay estaciones con temperatura'
+        }, 404
     
-    # Calcular estadísticas
-    temps = [e['temperatura'] for e in estaciones if e.get('temperatura') is not None]
+    if binario:
+        return grilla_a_binario(grilla), 200
     
-    return jsonify({
-        'exito': True,
-        'temperatura_minima': hoy.get('temperatura_minima'),
-        'temperatura_maxima': hoy.get('temperatura_maxima'),
-        'temperatura_promedio': round(sum(temps) / len(temps), 1) if temps else None,
-        'temperatura_actual_max': max(temps) if temps else None,
-        'temperatura_actual_min': min(temps) if temps else None,
-        'total_estaciones': len(temps),
-        'hay_alerta': pronostico.get('alerta_meteorologica') is not None
-    })
+    return {'exito': True, **grilla_a_json(grilla)}, 200
+
 
+@api_bp.route('/mapa/temperatura')
+def get_mapa_temperatura():
+    """
+    Obtiene una grilla de temperatura interpolada entre las estaciones (IDW).
+    
+    La grilla se calcula una sola vez por snapshot y resolución.
+    
+    Query params:
+        resolucion: Grados por celda (por defecto RESOLUCION_POR_DEFECTO);
+            se ajusta a la más cercana de interpolacion.RESOLUCIONES
+        formato: 'json' (por defecto) o 'binario' (encabezado de 16 bytes
+            y décimas de grado en int16; ver src/interpolacion.grilla_a_binario)
+            
+    Returns:
+        JSON con la esquina noroeste, la resolución, las dimensiones y los
+        valores por filas de norte a sur, o la grilla en binario
+    """
+    if not numpy_disponible():
+        return jsonify({'exito': False, 'error': 'Interpolación no disponible (falta NumPy)'}), 503
+    
+    resolucion = request.args.get('resolucion', RESOLUCION_POR_DEFECTO, type=float)
+    if resolucion is None or not RESOLUCION_MINIMA <= resolucion <= RESOLUCION_MAXIMA:
+        return jsonify({
+            'exito': False,
+            'error': f"Parámetro 'resolucion' inválido ({RESOLUCION_MINIMA} a {RESOLUCION_MAXIMA})"
+        }), 400
+    resolucion = ajustar_resolucion(resolucion)
+    
+    formato = request.args.get('formato', 'json')
+    if formato not in ('json', 'binario'):
+        return jsonify({'exito': False, 'error': "Parámetro 'formato' inválido (json o binario)"}), 400
+    
+    return responder_vista(
+        f"mapa_temperatura?resolucion={resolucion}&formato={formato}",
+        lambda clima: _vista_mapa_temperatura(clima, resolucion, formato == 'binario')
+    )
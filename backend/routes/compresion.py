@@ -0,0 +1,224 @@
+"""
+Variantes comprimidas (gzip y, si está instalado, brotli) de las respuestas.
+
+Todo se comprime una sola vez: los cuerpos de la API al generarse para un
+snapshot y los archivos de frontend/dist en el build. Por request solo se
+elige la variante según Accept-Encoding.
+
+Pre-comprimir el build (desde backend/):
+    python -m routes.compresion ../frontend/dist
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+
+try:
+    import brotli
+except ImportError:  # Dependencia opcional: sin ella solo se ofrece gzip
+    brotli = None
+
+
+# Por debajo de este tamaño la compresión no compensa los encabezados
+TAMANO_MINIMO = 512
+
+# Cuerpos de la API más grandes que esto (ej: grillas del mapa) se comprimen
+# con brotli en calidad 9: la 11 tarda segundos en el primer request
+TAMANO_BROTLI_RAPIDO = 128 * 1024
+
+# Extensiones de frontend/dist que vale la pena comprimir
+EXTENSIONES_COMPRIMIBLES = (
+    '.html', '.js', '.mjs', '.css', '.json', '.svg', '.txt', '.map', '.xml', '.ico', '.webmanifest'
+)
+
+# Extensión del archivo pre-comprimido por codificación, en orden de preferencia
+SUFIJOS = {'br': '.br', 'gzip': '.gz'}
+
+
+def codificaciones_disponibles():
+    """list: Codificaciones soportadas, de la preferida a la menos preferida."""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def comprimir(contenido, codificacion, calidad_br=11, nivel_gzip=9):
+    """
+    Comprime bytes con la máxima compresión (se hace una sola vez por contenido).
+    
+    Args:
+        contenido: Bytes a comprimir
+        codificacion: 'gzip' o 'br'
+        calidad_br: Calidad de brotli (0 a 11)
+        nivel_gzip: Nivel de gzip (1 a 9)
+        
+    Returns:
+        bytes: Contenido comprimido
+    """
+    if codificacion == 'br':
+        return brotli.compress(contenido, quality=calidad_br)
+    return gzip.compress(contenido, compresslevel=nivel_gzip, mtime=0)
+
+
+def variantes(contenido, rapido=False):
+    """
+    Genera las variantes comprimidas de un cuerpo.
+    
+    Args:
+        contenido: Bytes sin comprimir
+        rapido: Solo gzip en nivel 1, para cuerpos que pueden no reutilizarse
+            (ej: vistas filtradas)
+            
+    Returns:
+        dict: Codificación -> bytes. Siempre incluye 'identity'; las
+            comprimidas solo si el contenido supera TAMANO_MINIMO y la
+            compresión efectivamente lo achica
+    """
+    resultado = {'identity': contenido}
+    
+    if len(contenido) < TAMANO_MINIMO:
+        return resultado
+    
+    if rapido:
+        comprimido = comprimir(contenido, 'gzip', nivel_gzip=1)
+        if len(comprimido) < len(contenido):
+            resultado['gzip'] = comprimido
+        return resultado
+    
+    calidad_br = 11 if len(contenido) <= TAMANO_BROTLI_RAPIDO else 9
+    for codificacion in codificaciones_disponibles():
+        comprimido = comprimir(contenido, codificacion, calidad_br)
+        if len(comprimido) < len(contenido):
+            resultado[codificacion] = comprimido
+    
+    return resultado
+
+
+def elegir_codificacion(accept_encodings, disponibles):
+    """
+    Elige la mejor codificación aceptada por el cliente.
+    
+    Args:
+        accept_encodings: request.accept_encodings de Flask
+        disponibles: Codificaciones con variante (ej: claves de variantes())
+        
+    Returns:
+        str: 'br', 'gzip' o 'identity'
+    """
+    mejor = 'identity'
+    calidad_mejor = 0
+    
+    for codificacion in codificaciones_disponibles():
+        if codificacion not in disponibles:
+            continue
+        calidad = accept_encodings[codificacion]
+        if calidad > calidad_mejor:
+            mejor, calidad_mejor = codificacion, calidad
+    
+    return mejor
+
+
+def _escribir_atomico(ruta, contenido):
+    """Escribe un archivo de forma atómica (varios workers pueden iniciar a la vez)."""
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(contenido)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+
+def _variantes_pendientes(directorio):
+    """
+    Variantes que faltan o son más viejas que su original.
+    
+    Yields:
+        tuple: (ruta del original, codificación)
+    """
+    for raiz, _, archivos in os.walk(directorio):
+        for nombre in archivos:
+            if not nombre.endswith(EXTENSIONES_COMPRIMIBLES):
+                continue
+            
+            ruta = os.path.join(raiz, nombre)
+            if os.path.getsize(ruta) < TAMANO_MINIMO:
+                continue
+            
+            modificado = os.path.getmtime(ruta)
+            for codificacion in codificaciones_disponibles():
+                destino = ruta + SUFIJOS[codificacion]
+                if not os.path.exists(destino) or os.path.getmtime(destino) < modificado:
+                    yield ruta, codificacion
+
+
+def hay_variantes_pendientes(directorio):
+    """
+    Indica si precomprimir_directorio tiene algo que generar. Solo consulta
+    fechas de archivos, sin comprimir nada.
+    
+    Args:
+        directorio: Carpeta a recorrer (ej: frontend/dist)
+        
+    Returns:
+        bool: True si falta alguna variante o está desactualizada
+    """
+    if not directorio or not os.path.isdir(directorio):
+        return False
+    return next(_variantes_pendientes(directorio), None) is not None
+
+
+def precomprimir_directorio(directorio):
+    """
+    Genera junto a cada archivo comprimible sus versiones .gz y .br.
+    
+    Solo se regeneran las variantes que no existen o son más viejas que el
+    original, así que volver a ejecutarlo no vuelve a comprimir todo.
+    
+    Args:
+        directorio: Carpeta a recorrer (ej: frontend/dist)
+        
+    Returns:
+        int: Cantidad de variantes generadas
+    """
+    generadas = 0
+    if not directorio or not os.path.isdir(directorio):
+        return generadas
+    
+    leida, contenido = None, None
+    for ruta, codificacion in _variantes_pendientes(directorio):
+        if ruta != leida:
+            with open(ruta, 'rb') as f:
+                leida, contenido = ruta, f.read()
+        
+        _escribir_atomico(ruta + SUFIJOS[codificacion], comprimir(contenido, codificacion))
+        generadas += 1
+    
+    return generadas
+
+
+def variante_en_disco(ruta, accept_encodings):
+    """
+    Busca la variante pre-comprimida de un archivo que acepte el cliente.
+    
+    Args:
+        ruta: Archivo original
+        accept_encodings: request.accept_encodings de Flask
+        
+    Returns:
+        tuple: (ruta de la variante, codificación) o (ruta, None) si no hay
+    """
+    if not ruta.endswith(EXTENSIONES_COMPRIMIBLES):
+        return ruta, None
+    
+    disponibles = [c for c in codificaciones_disponibles() if os.path.exists(ruta + SUFIJOS[c])]
+    codificacion = elegir_codificacion(accept_encodings, disponibles)
+    if codificacion == 'identity':
+        return ruta, None
+    
+    return ruta + SUFIJOS[codificacion], codificacion
+
+
+if __name__ == '__main__':
+    for directorio in sys.argv[1:]:
+        print(f"{directorio}: {precomprimir_directorio(directorio)} variantes generadas")
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Canal de Server-Sent Events para avisar de nuevas versiones del clima.
+
+Es un servidor asyncio independiente de gunicorn: cada conexión abierta es
+una corrutina esperando un evento, no un hilo, así que cientos de clientes
+inactivos no ocupan los workers de la API. Un único bucle revisa la versión
+de la cache compartida (src/cache_compartido) y, cuando cambia, envía a
+todos los clientes:
+
+    id: <version>
+    event: version
+    data: {"version": <version>, "edad_segundos": <edad>}
+
+El proceso también inicia el renovador en segundo plano, así que los datos
+se mantienen al día aunque solo haya clientes conectados al stream.
+
+Ejecutar con:
+    python stream.py
+
+El endpoint queda en http://localhost:5001/api/stream (STREAM_PORT). El
+frontend solo se conecta si se construye con VITE_STREAM_URL apuntando a
+este servidor (en producción, un servicio aparte o un proxy sin buffering);
+sin esa variable, o si no puede conectarse, usa el sondeo periódico.
+
+Al conectarse por primera vez no se envía nada: el cliente acaba de pedir
+los datos. Al reconectar (Last-Event-ID) solo se envía la versión actual si
+es distinta de la última que recibió.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Agregar el directorio raíz al path
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+
+from src import cache_compartido
+from src.scraper import obtener_clima
+from src.utils import setup_logger
+from config.settings import CACHE_LEASE, CACHE_TTL_SOFT, CACHE_REFRESH_INTERVAL
+
+logger = setup_logger()
+
+STREAM_HOST = os.getenv('STREAM_HOST', '0.0.0.0')
+STREAM_PORT = int(os.getenv('STREAM_PORT', 5001))
+STREAM_POLL_INTERVAL = float(os.getenv('STREAM_POLL_INTERVAL', 1))  # segundos
+STREAM_HEARTBEAT = float(os.getenv('STREAM_HEARTBEAT', 25))  # segundos
+STREAM_MAX_CLIENTES = int(os.getenv('STREAM_MAX_CLIENTES', 1000))
+FRONTEND_URL = os.getenv('FRONTEND_URL', '*')
+
+CLAVE_CACHE = 'clima'
+RUTA_STREAM = '/api/stream'
+
+
+class Difusor:
+    """
+    Última versión conocida y aviso a los clientes que la esperan.
+    
+    Cada publicación reemplaza el evento, así que un cliente que despierta
+    siempre lee la versión más reciente aunque se haya perdido intermedias.
+    """
+    
+    def __init__(self):
+        self.version = 0
+        self.edad = None
+        self.clientes = 0
+        self._evento = asyncio.Event()
+    
+    def publicar(self, version, edad):
+        self.version = version
+        self.edad = edad
+        evento, self._evento = self._evento, asyncio.Event()
+        evento.set()
+    
+    async def esperar(self, timeout):
+        """Espera una nueva versión; retorna False si pasó el timeout."""
+        try:
+            await asyncio.wait_for(self._evento.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    def mensaje(self):
+        datos = json.dumps({'version': self.version, 'edad_segundos': self.edad})
+        return f"id: {self.version}\nevent: version\ndata: {datos}\n\n".encode('utf-8')
+
+
+async def vigilar_version(difusor):
+    """Revisa la versión de la cache compartida y la difunde cuando cambia."""
+    while True:
+        try:
+            estado = await asyncio.to_thread(cache_compartido.estado_cache, CLAVE_CACHE)
+            if estado['version'] != difusor.version:
+                difusor.publicar(estado['version'], estado['edad_segundos'])
+                logger.info(f"Stream: versión {estado['version']} enviada a {difusor.clientes} clientes")
+        except Exception as e:
+            logger.error(f"Stream: error al leer la versión de la cache: {e}")
+        
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+
+async def _leer_encabezados(reader):
+    """Lee la línea de request y los encabezados (máximo 8 KB)."""
+    datos = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=10)
+    if len(datos) > 8192:
+        raise ValueError('Encabezados demasiado grandes')
+    
+    lineas = datos.decode('latin-1').split('\r\n')
+    metodo, ruta, _ = lineas[0].split(' ', 2)
+    encabezados = {}
+    for linea in lineas[1:]:
+        if ':' in linea:
+            nombre, valor = linea.split(':', 1)
+            encabezados[nombre.strip().lower()] = valor.strip()
+    
+    return metodo, ruta.split('?', 1)[0], encabezados
+
+
+def _respuesta_simple(status, texto):
+    cuerpo = json.dumps({'error': texto}).encode('utf-8')
+    return (
+        f"HTTP/1.1 {status}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(cuerpo)}\r\n"
+        f"Access-Control-Allow-Origin: {FRONTEND_URL}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode('latin-1') + cuerpo
+
+
+async def atender_cliente(reader, writer, difusor):
+    """Atiende una conexión: valida el request y envía eventos hasta que se cierre."""
+    try:
+        try:
+            metodo, ruta, encabezados = await _leer_encabezados(reader)
+        except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+            writer.write(_respuesta_simple('400 Bad Request', 'Request inválido'))
+            await writer.drain()
+            return
+        
+        if metodo != 'GET' or ruta != RUTA_STREAM:
+            writer.write(_respuesta_simple('404 Not Found', 'Not found'))
+            await writer.drain()
+            return
+        
+        if difusor.clientes >= STREAM_MAX_CLIENTES:
+            writer.write(_respuesta_simple('503 Service Unavailable', 'Demasiados clientes'))
+            await writer.drain()
+            return
+        
+        difusor.clientes += 1
+        try:
+            writer.write((
+                "HTTP/1.1 200 OK\r\n"
+                "Content-Type: text/event-stream\r\n"
+                "Cache-Control: no-cache\r\n"
+                "X-Accel-Buffering: no\r\n"
+                f"Access-Control-Allow-Origin: {FRONTEND_URL}\r\n"
+                "Connection: keep-alive\r\n\r\n"
+                "retry: 10000\n\n"
+            ).encode('latin-1'))
+            
+            # Al reconectar, el navegador informa la última versión recibida;
+            # en la primera conexión el cliente ya tiene los datos actuales
+            ultima = encabezados.get('last-event-id')
+            if ultima is not None and ultima != str(difusor.version) and difusor.version:
+                writer.write(difusor.mensaje())
+            await writer.drain()
+            
+            while True:
+                if await difusor.esperar(STREAM_HEARTBEAT):
+                    writer.write(difusor.mensaje())
+                else:
+                    # Comentario SSE: mantiene viva la conexión en proxies
+                    writer.write(b": ping\n\n")
+                await writer.drain()
+        finally:
+            difusor.clientes -= 1
+    
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+
+async def main():
+    """Inicia el vigilante de versiones y el servidor SSE."""
+    difusor = Difusor()
+    
+    # Sin tráfico en la API, este proceso mantiene los datos renovados
+    cache_compartido.iniciar_renovador(
+        CLAVE_CACHE, obtener_clima, CACHE_TTL_SOFT, CACHE_LEASE, CACHE_REFRESH_INTERVAL
+    )
+    
+    servidor = await asyncio.start_server(
+        lambda r, w: atender_cliente(r, w, difusor), STREAM_HOST, STREAM_PORT
+    )
+    
+    print("\n📡 Clima San Luis - Stream de eventos")
+    print("=" * 40)
+    print(f"📍 Endpoint: http://localhost:{STREAM_PORT}{RUTA_STREAM}")
+    print("=" * 40 + "\n")
+    
+    async with servidor:
+        await asyncio.gather(servidor.serve_forever(), vigilar_version(difusor))
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Benchmarks del parser sobre un corpus de páginas guardadas.
+
+Mide latencia (percentiles) y asignaciones de memoria de los extractores de
+src/scraper.py y del guardado/carga del snapshot JSON, y escribe los
+resultados en JSON para comparar corridas entre cambios del parser.
+
+El corpus por defecto (benchmarks/fixtures) son páginas de REM armadas con
+la estructura del sitio y los datos de los snapshots del 06/12/2025 y el
+27/01/2026. Las filas de vEstaciones tienen la forma de las del sitio, con
+un campo más después de la precipitación, así que la regex de filas
+original también las reconoce y ambos parsers dan las mismas estaciones.
+Con --corpus se puede apuntar a cualquier carpeta de páginas descargadas.
+
+Uso:
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --iteraciones 500 --salida antes.json
+    python benchmarks/bench_parser.py --corpus /ruta/a/paginas --comparar antes.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.scraper import (
+    extraer_fragmentos, extraer_pronostico_general, extraer_estaciones_desde_js,
+    extraer_pronostico_extendido, parsear_pagina, limpiar_cache_parseo
+)
+from src.utils import guardar_ultimo_clima, cargar_ultimo_clima
+
+
+DIRECTORIO_BENCH = os.path.dirname(os.path.abspath(__file__))
+CORPUS_POR_DEFECTO = os.path.join(DIRECTORIO_BENCH, 'fixtures')
+RESULTADOS_POR_DEFECTO = os.path.join(DIRECTORIO_BENCH, 'resultados')
+
+
+def cargar_corpus(directorio):
+    """
+    Lee todas las páginas .html de un directorio.
+    
+    Args:
+        directorio: Carpeta con las páginas guardadas
+        
+    Returns:
+        list: Tuplas (nombre de archivo, HTML)
+    """
+    paginas = []
+    
+    for nombre in sorted(os.listdir(directorio)):
+        if nombre.endswith(('.html', '.htm')):
+            with open(os.path.join(directorio, nombre), 'r', encoding='utf-8') as f:
+                paginas.append((nombre, f.read()))
+    
+    return paginas
+
+
+def percentil(valores_ordenados, p):
+    """Percentil p (0-100) por interpolación lineal sobre valores ya ordenados."""
+    if len(valores_ordenados) == 1:
+        return valores_ordenados[0]
+    
+    posicion = (len(valores_ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    fraccion = posicion - inferior
+    return valores_ordenados[inferior] + (valores_ordenados[superior] - valores_ordenados[inferior]) * fraccion
+
+
+def medir(funcion, preparar, iteraciones):
+    """
+    Ejecuta un caso de benchmark.
+    
+    Args:
+        funcion: Función a medir; recibe el valor que retorna preparar()
+        preparar: Función sin argumentos que arma la entrada de cada
+            iteración (su costo no se mide)
+        iteraciones: Cantidad de ejecuciones cronometradas
+        
+    Returns:
+        dict: Percentiles de latencia en milisegundos y asignaciones de una
+            ejecución (pico de memoria y bloques asignados)
+    """
+    # Calentamiento (imports perezosos, caches de re, etc.)
+    funcion(preparar())
+    
+    tiempos = []
+    for _ in range(iteraciones):
+        entrada = preparar()
+        inicio = time.perf_counter()
+        funcion(entrada)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    
+    entrada = preparar()
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    # El snapshot también asigna memoria: medir el pico solo desde acá
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    funcion(entrada)
+    _, pico = tracemalloc.get_traced_memory()
+    despues = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    
+    diferencias = despues.compare_to(antes, 'filename')
+    bloques = sum(d.count_diff for d in diferencias if d.count_diff > 0)
+    
+    tiempos.sort()
+    
+    return {
+        'iteraciones': iteraciones,
+        'media_ms': round(statistics.fmean(tiempos), 4),
+        'p50_ms': round(percentil(tiempos, 50), 4),
+        'p90_ms': round(percentil(tiempos, 90), 4),
+        'p99_ms': round(percentil(tiempos, 99), 4),
+        'max_ms': round(tiempos[-1], 4),
+        'pico_memoria_bytes': pico - base,
+        'bloques_retenidos': bloques
+    }
+
+
+def casos_de_pagina(html, directorio_temporal):
+    """
+    Arma los casos de benchmark para una página.
+    
+    Los extractores cachean por digest del HTML, así que cada iteración
+    vacía la cache de parseo antes de medir (salvo el caso "cache").
+    """
+    def sin_cache():
+        limpiar_cache_parseo()
+        return html
+    
+    fragmentos = extraer_fragmentos(html)
+    texto_pronostico = fragmentos['pronostico'].get_text() if fragmentos['pronostico'] else ''
+    
+    pagina = parsear_pagina(html)
+    snapshot = {
+        'pronostico_general': pagina['pronostico_general'],
+        'estaciones': pagina['estaciones'],
+        'exito': True,
+        'error': None,
+        'usando_cache': False
+    }
+    archivo_snapshot = os.path.join(directorio_temporal, 'ultimo_clima.json')
+    
+    def ida_y_vuelta(datos):
+        guardar_ultimo_clima(datos, archivo_snapshot)
+        cargar_ultimo_clima(archivo_snapshot)
+    
+    return {
+        'extraer_fragmentos': (extraer_fragmentos, lambda: html),
+        'extraer_pronostico_general': (extraer_pronostico_general, sin_cache),
+        'extraer_estaciones_desde_js': (extraer_estaciones_desde_js, sin_cache),
+        'extraer_pronostico_extendido': (extraer_pronostico_extendido, lambda: texto_pronostico),
+        'parsear_pagina': (parsear_pagina, sin_cache),
+        'parsear_pagina (cache)': (parsear_pagina, lambda: html),
+        'snapshot_json (guardar + cargar)': (ida_y_vuelta, lambda: dict(snapshot))
+    }
+
+
+def ejecutar(paginas, iteraciones):
+    """
+    Corre todos los casos sobre todas las páginas.
+    
+    Returns:
+        dict: Caso -> página -> métricas
+    """
+    resultados = {}
+    
+    with tempfile.TemporaryDirectory() as directorio_temporal:
+        for nombre, html in paginas:
+            for caso, (funcion, preparar) in casos_de_pagina(html, directorio_temporal).items():
+                resultados.setdefault(caso, {})[nombre] = medir(funcion, preparar, iteraciones)
+    
+    return resultados
+
+
+def comparar(actual, anterior):
+    """
+    Imprime la variación de p50 y pico de memoria respecto de otra corrida.
+    
+    Args:
+        actual: Resultados de esta corrida
+        anterior: Resultados cargados del JSON de otra corrida
+    """
+    print(f"\n{'Caso':<36} {'Página':<22} {'p50 antes':>10} {'p50 ahora':>10} {'Δ%':>8} {'mem Δ%':>8}")
+    print("-" * 98)
+    
+    for caso, paginas in actual.items():
+        for pagina, metricas in paginas.items():
+            previas = anterior.get(caso, {}).get(pagina)
+            if not previas:
+                continue
+            
+            delta = (metricas['p50_ms'] - previas['p50_ms']) / previas['p50_ms'] * 100 if previas['p50_ms'] else 0
+            delta_mem = ((metricas['pico_memoria_bytes'] - previas['pico_memoria_bytes'])
+                         / previas['pico_memoria_bytes'] * 100) if previas['pico_memoria_bytes'] else 0
+            print(f"{caso:<36} {pagina[:22]:<22} {previas['p50_ms']:>10.3f} {metricas['p50_ms']:>10.3f} "
+                  f"{delta:>+7.1f}% {delta_mem:>+7.1f}%")
+
+
+def main():
+    """
+    Función principal con manejo de argumentos.
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks del parser de clima')
+    
+    parser.add_argument(
+        '--corpus', '-c',
+        type=str,
+        default=CORPUS_POR_DEFECTO,
+        help='Directorio con páginas .html (default: benchmarks/fixtures)'
+    )
+    
+    parser.add_argument(
+        '--iteraciones', '-n',
+        type=int,
+        default=200,
+        help='Ejecuciones cronometradas por caso y página (default: 200)'
+    )
+    
+    parser.add_argument(
+        '--salida', '-o',
+        type=str,
+        help='Archivo JSON de resultados (default: benchmarks/resultados/bench_<fecha>.json)'
+    )
+    
+    parser.add_argument(
+        '--comparar',
+        type=str,
+        help='JSON de una corrida anterior para mostrar la variación'
+    )
+    
+    args = parser.parse_args()
+    
+    # Los extractores y el snapshot loguean cada llamada
+    logging.getLogger('clima_san_luis').setLevel(logging.WARNING)
+    
+    paginas = cargar_corpus(args.corpus)
+    if not paginas:
+        print(f"❌ No hay páginas .html en {args.corpus}")
+        sys.exit(1)
+    
+    print(f"📊 Benchmark del parser: {len(paginas)} páginas, {args.iteraciones} iteraciones por caso")
+    
+    resultados = ejecutar(paginas, args.iteraciones)
+    
+    print(f"\n{'Caso':<36} {'Página':<22} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'pico KB':>9}")
+    print("-" * 98)
+    for caso, por_pagina in resultados.items():
+        for pagina, m in por_pagina.items():
+            print(f"{caso:<36} {pagina[:22]:<22} {m['p50_ms']:>9.3f} {m['p90_ms']:>9.3f} "
+                  f"{m['p99_ms']:>9.3f} {m['pico_memoria_bytes'] / 1024:>9.1f}")
+    
+    informe = {
+        'fecha': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'corpus': [nombre for nombre, _ in paginas],
+        'iteraciones': args.iteraciones,
+        'resultados': resultados
+    }
+    
+    salida = args.salida
+    if salida is None:
+        os.makedirs(RESULTADOS_POR_DEFECTO, exist_ok=True)
+        salida = os.path.join(RESULTADOS_POR_DEFECTO, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2)
+    
+    print(f"\n📄 Resultados guardados en: {salida}")
+    
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            comparar(resultados, json.load(f)['resultados'])
+
+
+if __name__ == "__main__":
+    main()
@@ -42,8 +42,16 @@ if [ ! -d "dist" ]; then
 fi
 
 echo "✅ Frontend construido exitosamente en frontend/dist/"
+cd ..
+
+# Paso 4: Pre-comprimir los archivos del build (.gz/.br) para no hacerlo
+# al iniciar cada worker
+echo ""
+echo "🗜️  Pre-comprimiendo archivos del frontend..."
+cd backend
+python -m routes.compresion ../frontend/dist
 
-# Paso 4: Los archivos estáticos ya están en frontend/dist/
+# Los archivos estáticos ya están en frontend/dist/
 # El backend los servirá desde esa ubicación configurada en app.py
 echo ""
 echo "✅ Build completado!"
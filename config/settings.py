@@ -8,6 +8,42 @@ load_dotenv()
 URL_CLIMA = os.getenv("URL_CLIMA", "https://clima.sanluis.gob.ar/")
 URL_ESTACION = os.getenv("URL_ESTACION", "https://clima.sanluis.gob.ar/Estacion.aspx?Estacion=20")
 
+# Detalle por estación (Estacion.aspx): desactivado por defecto porque
+# implica una petición adicional por cada estación de la red
+INCLUIR_DETALLE_ESTACIONES = os.getenv("INCLUIR_DETALLE_ESTACIONES", "false").lower() == "true"
+DETALLE_ESTACIONES_WORKERS = int(os.getenv("DETALLE_ESTACIONES_WORKERS", "8"))
+
+# Resultados de parseo cacheados en memoria (por digest del HTML)
+PARSE_CACHE_SIZE = int(os.getenv("PARSE_CACHE_SIZE", "32"))
+
+# Búsquedas de estaciones por nombre recientes cacheadas en memoria (por snapshot)
+BUSQUEDA_CACHE_SIZE = int(os.getenv("BUSQUEDA_CACHE_SIZE", "256"))
+
+# Histórico de lecturas de estaciones (SQLite)
+SERIES_DB = os.getenv(
+    "SERIES_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "series.db")
+)
+
+# Archivo de páginas descargadas (comprimidas, una copia por contenido)
+ARCHIVAR_PAGINAS = os.getenv("ARCHIVAR_PAGINAS", "true").lower() == "true"
+ARCHIVO_DIR = os.getenv(
+    "ARCHIVO_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "archivo")
+)
+
+# Cache de la API compartida entre workers de gunicorn (SQLite)
+CACHE_COMPARTIDO_DB = os.getenv(
+    "CACHE_COMPARTIDO_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "cache_api.db")
+)
+CACHE_LEASE = float(os.getenv("CACHE_LEASE", "90"))  # segundos máximos de una renovación
+# TTL blando: pasado este tiempo el dato se renueva en segundo plano.
+# TTL duro: pasado este tiempo el dato ya no se sirve y el request espera la renovación
+CACHE_TTL_SOFT = float(os.getenv("CACHE_TTL_SOFT", "60"))  # segundos
+CACHE_TTL_HARD = float(os.getenv("CACHE_TTL_HARD", "900"))  # segundos
+CACHE_REFRESH_INTERVAL = float(os.getenv("CACHE_REFRESH_INTERVAL", "10"))  # segundos
+
 # Configuración de ejecución
 HORA_EJECUCION = os.getenv("HORA_EJECUCION", "07:00")
 
@@ -21,6 +57,16 @@ REQUEST_TIMEOUT = 30  # segundos
 REQUEST_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 }
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))  # conexiones keep-alive por host
+
+# Reintentos y circuit breaker hacia el sitio de clima
+REQUEST_RETRIES = int(os.getenv("REQUEST_RETRIES", "3"))
+REQUEST_RETRY_DELAY = float(os.getenv("REQUEST_RETRY_DELAY", "1"))  # segundos, se duplica en cada intento
+REQUEST_RETRY_MAX_DELAY = float(os.getenv("REQUEST_RETRY_MAX_DELAY", "8"))  # segundos
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "45"))  # segundos totales por llamada
+REQUEST_DEADLINE_API = float(os.getenv("REQUEST_DEADLINE_API", "5"))  # segundos, renovación dentro de un request: un solo intento
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN", "120"))  # segundos
 
 # Configuración de logs
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
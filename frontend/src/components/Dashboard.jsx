@@ -1,4 +1,4 @@
-import { useState, useEffect, useMemo } from 'react';
+import { useState, useEffect, useMemo, useRef } from 'react';
 import axios from 'axios';
 import TemperatureChart from './TemperatureChart';
 import TemperatureMap from './TemperatureMap';
@@ -22,6 +22,11 @@ const getApiUrl = () => {
 
 const API_URL = getApiUrl();
 
+// URL del canal de eventos (backend/stream.py, servidor aparte de la API).
+// Solo se usa si está configurada: sin ella el dashboard hace sondeo
+// (en desarrollo: VITE_STREAM_URL=http://localhost:5001/api/stream)
+const STREAM_URL = import.meta.env.VITE_STREAM_URL || null;
+
 // SVG Icons
 const SunCloudIcon = () => (
   <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="2" strokeLinecap="round" strokeLinejoin="round">
@@ -119,22 +124,19 @@ export default function Dashboard() {
     try {
       setError(null);
       
-      const [climaRes, estacionesRes, resumenRes] = await Promise.all([
-        axios.get(`${API_URL}/pronostico`),
-        axios.get(`${API_URL}/estaciones`),
-        axios.get(`${API_URL}/resumen`)
-      ]);
-
-      if (climaRes.data.exito) {
-        setClima(climaRes.data);
+      // Pronóstico, estaciones y resumen del mismo snapshot en un solo request
+      const { data } = await axios.get(`${API_URL}/dashboard`);
+
+      if (data.pronostico?.exito) {
+        setClima(data.pronostico);
       }
 
-      if (estacionesRes.data.exito) {
-        setEstaciones(estacionesRes.data.estaciones);
+      if (data.estaciones?.exito) {
+        setEstaciones(data.estaciones.estaciones);
       }
 
-      if (resumenRes.data.exito) {
-        setResumen(resumenRes.data);
+      if (data.resumen?.exito) {
+        setResumen(data.resumen);
       }
 
       setLastUpdate(new Date());
@@ -146,13 +148,33 @@ export default function Dashboard() {
     }
   };
 
+  const streamConectado = useRef(false);
+
   useEffect(() => {
     fetchData();
     
-    // Auto-refresh cada 5 minutos
-    const interval = setInterval(fetchData, 5 * 60 * 1000);
+    // El servidor avisa cada nueva versión de los datos por SSE
+    let stream = null;
+    if (STREAM_URL && window.EventSource) {
+      stream = new EventSource(STREAM_URL);
+      stream.onopen = () => { streamConectado.current = true; };
+      stream.onerror = () => { streamConectado.current = false; };
+      stream.addEventListener('version', fetchData);
+    }
+    
+    // Auto-refresh cada 5 minutos si no hay canal de eventos
+    const interval = setInterval(() => {
+      if (!streamConectado.current) {
+        fetchData();
+      }
+    }, 5 * 60 * 1000);
     
-    return () => clearInterval(interval);
+    return () => {
+      clearInterval(interval);
+      if (stream) {
+        stream.close();
+      }
+    };
   }, []);
 
   // Función helper para buscar estación por nombre (búsqueda flexible)
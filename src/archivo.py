@@ -0,0 +1,211 @@
+import gzip
+import heapq
+import itertools
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import ARCHIVO_DIR
+from src.utils import setup_logger, calcular_digest
+
+logger = setup_logger()
+
+# Estructura del archivo:
+#   objetos/ab/abcdef...html.gz   página comprimida, nombrada por su SHA-256
+#   indice/AAAA-MM-DD.tsv         una línea por descarga de ese día: fecha, digest, url
+#   indice.tsv                    índice en un solo archivo de versiones
+#                                 anteriores (se sigue leyendo)
+# Las líneas de un día las agregan varios procesos, así que no están
+# necesariamente en orden: cada día se ordena al leerlo.
+NOMBRE_INDICE = 'indice.tsv'
+DIRECTORIO_INDICE = 'indice'
+DIRECTORIO_OBJETOS = 'objetos'
+
+
+def ruta_objeto(digest, directorio=None):
+    """
+    Ruta del objeto comprimido de una página.
+    
+    Args:
+        digest: SHA-256 hexadecimal del HTML
+        directorio: Raíz del archivo (usa ARCHIVO_DIR por defecto)
+        
+    Returns:
+        str: Ruta del .html.gz
+    """
+    directorio = directorio or ARCHIVO_DIR
+    return os.path.join(directorio, DIRECTORIO_OBJETOS, digest[:2], f'{digest}.html.gz')
+
+
+def es_archivo(directorio):
+    """True si el directorio es un archivo de páginas (tiene índice)."""
+    return (os.path.isdir(os.path.join(directorio, DIRECTORIO_INDICE))
+            or os.path.isfile(os.path.join(directorio, NOMBRE_INDICE)))
+
+
+def archivar_pagina(html, url='', fecha=None, directorio=None):
+    """
+    Guarda una página descargada en el archivo.
+    
+    El contenido se guarda una sola vez por digest; cada llamada agrega una
+    línea al índice con la fecha de descarga, aunque la página sea idéntica
+    a una anterior.
+    
+    Args:
+        html: Contenido de la página
+        url: URL de la que se descargó
+        fecha: Momento de la descarga (ahora por defecto)
+        directorio: Raíz del archivo (usa ARCHIVO_DIR por defecto)
+        
+    Returns:
+        str: Digest de la página
+    """
+    directorio = directorio or ARCHIVO_DIR
+    digest = calcular_digest(html)
+    destino = ruta_objeto(digest, directorio)
+    
+    if not os.path.exists(destino):
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        # Escritura atómica: un lector nunca ve un objeto a medio escribir
+        descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(destino), suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                f.write(gzip.compress(html.encode('utf-8'), mtime=0))
+            os.replace(temporal, destino)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+    
+    fecha = fecha or datetime.now()
+    linea = f"{fecha.isoformat(timespec='seconds')}\t{digest}\t{url}\n".encode('utf-8')
+    indice = os.path.join(directorio, DIRECTORIO_INDICE, f"{fecha.date().isoformat()}.tsv")
+    os.makedirs(os.path.dirname(indice), exist_ok=True)
+    
+    # Una sola escritura en modo append: las líneas de distintos procesos
+    # no se intercalan
+    descriptor = os.open(indice, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(descriptor, linea)
+    finally:
+        os.close(descriptor)
+    
+    return digest
+
+
+def leer_objeto(digest, directorio=None):
+    """
+    Lee una página del archivo por su digest.
+    
+    Args:
+        digest: SHA-256 hexadecimal del HTML
+        directorio: Raíz del archivo (usa ARCHIVO_DIR por defecto)
+        
+    Returns:
+        str: Contenido de la página
+    """
+    with gzip.open(ruta_objeto(digest, directorio), 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def _leer_indice(ruta, desde, hasta):
+    """Entradas de un archivo de índice dentro del rango, ordenadas por fecha."""
+    entradas = []
+    
+    with open(ruta, 'r', encoding='utf-8') as f:
+        for linea in f:
+            partes = linea.rstrip('\n').split('\t')
+            if len(partes) != 3:
+                continue
+            
+            fecha = datetime.fromisoformat(partes[0])
+            if desde is not None and fecha < desde:
+                continue
+            if hasta is not None and fecha > hasta:
+                continue
+            
+            entradas.append((fecha, partes[1], partes[2]))
+    
+    # sort es estable: descargas del mismo segundo conservan su orden
+    entradas.sort(key=lambda entrada: entrada[0])
+    yield from entradas
+
+
+def _dias_en_rango(directorio, desde, hasta):
+    """Rutas de los índices diarios que pueden tener descargas del rango, en orden."""
+    carpeta = os.path.join(directorio, DIRECTORIO_INDICE)
+    if not os.path.isdir(carpeta):
+        return []
+    
+    primero = desde.date().isoformat() if desde is not None else ''
+    ultimo = hasta.date().isoformat() if hasta is not None else '9999'
+    return [
+        os.path.join(carpeta, nombre)
+        for nombre in sorted(os.listdir(carpeta))
+        if nombre.endswith('.tsv') and primero <= nombre[:-len('.tsv')] <= ultimo
+    ]
+
+
+def iterar_indice(directorio=None, desde=None, hasta=None):
+    """
+    Recorre el índice de descargas en orden de fecha, sin leer las páginas.
+    
+    Solo se leen los índices de los días del rango, de a uno por vez.
+    
+    Args:
+        directorio: Raíz del archivo (usa ARCHIVO_DIR por defecto)
+        desde: datetime mínimo (inclusive)
+        hasta: datetime máximo (inclusive)
+        
+    Yields:
+        tuple: (fecha como datetime, digest, url)
+    """
+    directorio = directorio or ARCHIVO_DIR
+    
+    # Los días no se superponen: basta con encadenarlos en orden
+    fuentes = [itertools.chain.from_iterable(
+        _leer_indice(ruta, desde, hasta) for ruta in _dias_en_rango(directorio, desde, hasta)
+    )]
+    
+    anterior = os.path.join(directorio, NOMBRE_INDICE)
+    if os.path.exists(anterior):
+        fuentes.append(_leer_indice(anterior, desde, hasta))
+    
+    yield from heapq.merge(*fuentes, key=lambda entrada: entrada[0])
+
+
+def iterar_paginas(directorio=None, desde=None, hasta=None, repetidas=True):
+    """
+    Recorre las páginas archivadas en orden de descarga.
+    
+    Se descomprime una página por vez, así que la memoria no depende del
+    tamaño del archivo.
+    
+    Args:
+        directorio: Raíz del archivo (usa ARCHIVO_DIR por defecto)
+        desde: datetime mínimo (inclusive)
+        hasta: datetime máximo (inclusive)
+        repetidas: Si es False, cada contenido se entrega solo la primera
+            vez que aparece
+            
+    Yields:
+        tuple: (fecha, digest, url, html)
+    """
+    vistas = set()
+    
+    for fecha, digest, url in iterar_indice(directorio, desde, hasta):
+        if not repetidas:
+            if digest in vistas:
+                continue
+            vistas.add(digest)
+        
+        try:
+            html = leer_objeto(digest, directorio)
+        except OSError as e:
+            logger.error(f"Página archivada {digest} ilegible: {e}")
+            continue
+        
+        yield fecha, digest, url, html
@@ -0,0 +1,380 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import CACHE_COMPARTIDO_DB
+from src.utils import setup_logger, VueloUnico
+
+logger = setup_logger()
+
+# Una fila por clave. 'version' aumenta con cada publicación que cambia el
+# contenido (republicar lo mismo solo actualiza 'actualizado'); el lease
+# (dueño + vencimiento) indica qué proceso está renovando el dato, para que
+# los demás no vayan al sitio al mismo tiempo.
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    clave       TEXT PRIMARY KEY,
+    version     INTEGER NOT NULL DEFAULT 0,
+    actualizado REAL NOT NULL DEFAULT 0,
+    datos       TEXT,
+    lease_dueno TEXT,
+    lease_vence REAL NOT NULL DEFAULT 0
+);
+"""
+
+_conexiones = threading.local()
+
+# Último dato decodificado por clave en este proceso: (version, actualizado, datos)
+_decodificados = {}
+_lock_decodificados = threading.Lock()
+
+# Renovaciones en curso en este proceso: los hilos que encuentran el dato
+# vencido mientras otro lo renueva no compiten por el lease
+_renovaciones = VueloUnico()
+
+# Hilos renovadores en segundo plano, por (pid, ruta, clave)
+_renovadores = {}
+_lock_renovadores = threading.Lock()
+
+
+def _conectar(ruta=None):
+    """
+    Conexión SQLite del hilo actual. Se vuelve a abrir si el proceso es un
+    fork (los workers de gunicorn) para no compartir la del padre.
+    """
+    ruta = ruta or CACHE_COMPARTIDO_DB
+    clave = (os.getpid(), ruta)
+    abiertas = getattr(_conexiones, 'por_ruta', None)
+    if abiertas is None:
+        abiertas = _conexiones.por_ruta = {}
+    
+    conexion = abiertas.get(clave)
+    if conexion is None:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        conexion = sqlite3.connect(ruta, timeout=10, isolation_level=None)
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("PRAGMA synchronous=NORMAL")
+        conexion.executescript(ESQUEMA)
+        abiertas[clave] = conexion
+    
+    return conexion
+
+
+def _dueno():
+    """Identifica al proceso e hilo que toma un lease."""
+    return f"{os.getpid()}:{threading.get_ident()}"
+
+
+def leer(clave, ruta=None):
+    """
+    Lee el último dato publicado para una clave.
+    
+    Solo se consulta la versión; el JSON se decodifica una vez por versión
+    y por proceso, y las lecturas siguientes reutilizan ese objeto (que no
+    debe modificarse).
+    
+    Args:
+        clave: Nombre del dato (ej: 'clima')
+        ruta: Archivo de la base (usa CACHE_COMPARTIDO_DB por defecto)
+        
+    Returns:
+        tuple: (version, segundos desde la publicación, datos); datos es
+            None si nunca se publicó
+    """
+    conexion = _conectar(ruta)
+    fila = conexion.execute(
+        "SELECT version, actualizado FROM snapshots WHERE clave = ?", (clave,)
+    ).fetchone()
+    if fila is None or fila[0] == 0:
+        return 0, None, None
+    
+    version, actualizado = fila
+    with _lock_decodificados:
+        en_memoria = _decodificados.get((ruta, clave))
+    
+    if en_memoria is None or en_memoria[0] != version:
+        fila = conexion.execute(
+            "SELECT version, actualizado, datos FROM snapshots WHERE clave = ?", (clave,)
+        ).fetchone()
+        en_memoria = (fila[0], fila[1], json.loads(fila[2]))
+        with _lock_decodificados:
+            actual = _decodificados.get((ruta, clave))
+            if actual is None or actual[0] < en_memoria[0]:
+                _decodificados[(ruta, clave)] = en_memoria
+    
+    # La edad sale de la fila: republicar el mismo contenido la renueva sin
+    # cambiar la versión
+    version, _, datos = en_memoria
+    return version, max(time.time() - actualizado, 0), datos
+
+
+def publicar(clave, datos, ruta=None):
+    """
+    Publica un dato nuevo para todos los procesos.
+    
+    Si el contenido es igual al publicado, la versión no cambia (solo se
+    renueva su antigüedad), así que los clientes no reciben una "nueva
+    versión" en cada renovación sin cambios.
+    
+    Args:
+        clave: Nombre del dato
+        datos: Objeto serializable a JSON
+        ruta: Archivo de la base (usa CACHE_COMPARTIDO_DB por defecto)
+        
+    Returns:
+        int: Nueva versión
+    """
+    contenido = json.dumps(datos, ensure_ascii=False, separators=(',', ':'))
+    ahora = time.time()
+    conexion = _conectar(ruta)
+    
+    conexion.execute("BEGIN IMMEDIATE")
+    try:
+        conexion.execute(
+            "INSERT INTO snapshots (clave, version, actualizado, datos) VALUES (?, 1, ?, ?) "
+            "ON CONFLICT(clave) DO UPDATE SET version = version + (datos IS NOT excluded.datos), "
+            "actualizado = excluded.actualizado, datos = excluded.datos",
+            (clave, ahora, contenido)
+        )
+        version = conexion.execute(
+            "SELECT version FROM snapshots WHERE clave = ?", (clave,)
+        ).fetchone()[0]
+        conexion.execute("COMMIT")
+    except BaseException:
+        conexion.execute("ROLLBACK")
+        raise
+    
+    # El proceso que publica ya tiene el dato: no necesita decodificarlo. Si
+    # la versión no cambió se conserva el objeto anterior, para que las
+    # cachés por identidad del snapshot (cuerpos, índices) sigan valiendo
+    with _lock_decodificados:
+        actual = _decodificados.get((ruta, clave))
+        if actual is None or actual[0] != version:
+            _decodificados[(ruta, clave)] = (version, ahora, datos)
+    
+    return version
+
+
+def tomar_lease(clave, duracion, ruta=None):
+    """
+    Intenta quedarse con la renovación de una clave.
+    
+    Solo un proceso a la vez obtiene el lease; si el dueño muere sin
+    liberarlo, vence a los 'duracion' segundos y otro lo puede tomar.
+    
+    Args:
+        clave: Nombre del dato
+        duracion: Segundos de validez del lease
+        ruta: Archivo de la base (usa CACHE_COMPARTIDO_DB por defecto)
+        
+    Returns:
+        bool: True si el lease es de este proceso
+    """
+    ahora = time.time()
+    conexion = _conectar(ruta)
+    conexion.execute("INSERT OR IGNORE INTO snapshots (clave) VALUES (?)", (clave,))
+    cursor = conexion.execute(
+        "UPDATE snapshots SET lease_dueno = ?, lease_vence = ? "
+        "WHERE clave = ? AND (lease_vence < ? OR lease_dueno = ?)",
+        (_dueno(), ahora + duracion, clave, ahora, _dueno())
+    )
+    return cursor.rowcount == 1
+
+
+def liberar_lease(clave, ruta=None):
+    """
+    Libera el lease de una clave si es de este proceso.
+    
+    Args:
+        clave: Nombre del dato
+        ruta: Archivo de la base (usa CACHE_COMPARTIDO_DB por defecto)
+    """
+    _conectar(ruta).execute(
+        "UPDATE snapshots SET lease_dueno = NULL, lease_vence = 0 "
+        "WHERE clave = ? AND lease_dueno = ?",
+        (clave, _dueno())
+    )
+
+
+def _es_dato_fresco(datos):
+    """
+    Indica si lo que retornó renovar() es un dato nuevo. Un resultado con
+    exito=False (error) o usando_cache=True (respaldo del último guardado)
+    no lo es: publicarlo lo haría pasar por fresco.
+    """
+    if not isinstance(datos, dict):
+        return datos is not None
+    return datos.get('exito', True) and not datos.get('usando_cache')
+
+
+def _renovar_con_lease(clave, version, renovar, vigencia, duracion_lease, ruta):
+    """
+    Renueva el dato si este proceso obtiene el lease.
+    
+    Solo se publica un dato fresco (ver _es_dato_fresco). Si la renovación
+    falla se conserva la versión publicada, con su antigüedad.
+    
+    Returns:
+        tuple: (datos, segundos desde su publicación) con los datos nuevos,
+            los que otro proceso acaba de publicar o, si la renovación
+            falló, los ya publicados; si nunca se publicó nada, el
+            resultado fallido con antigüedad None. None si el lease lo
+            tiene otro proceso
+    """
+    if not tomar_lease(clave, duracion_lease, ruta):
+        return None
+    
+    try:
+        # Otro proceso pudo publicar entre la lectura y el lease
+        version_actual, edad, datos_actuales = leer(clave, ruta)
+        if version_actual != version and datos_actuales is not None and edad <= vigencia:
+            return datos_actuales, edad
+        
+        nuevos = renovar()
+        if not _es_dato_fresco(nuevos):
+            logger.warning(f"La renovación de '{clave}' falló; se mantiene la versión {version_actual}")
+            if datos_actuales is not None:
+                return datos_actuales, edad
+            return nuevos, None
+        
+        # Si el contenido no cambió, leer() retorna el objeto ya publicado
+        publicar(clave, nuevos, ruta)
+        _, edad, datos = leer(clave, ruta)
+        return datos, edad
+    finally:
+        liberar_lease(clave, ruta)
+
+
+def obtener_o_renovar(clave, renovar, vigencia, duracion_lease, espera=0.1, ruta=None):
+    """
+    Retorna el dato compartido, renovándolo si está vencido.
+    
+    Si el dato venció, un solo hilo de un solo proceso (el que toma el
+    lease) llama a renovar(). Los demás hilos del mismo proceso se coalescen
+    sobre esa renovación y el resto de los procesos siguen sirviendo la
+    versión anterior. Si todavía no hay ninguna versión, se espera a que el
+    dueño del lease la publique (o a que el lease venza y se pueda tomar).
+    
+    Args:
+        clave: Nombre del dato
+        renovar: Función sin argumentos que obtiene el dato nuevo
+        vigencia: Segundos durante los que un dato se considera fresco
+        duracion_lease: Segundos máximos que puede tardar renovar()
+        espera: Intervalo de sondeo mientras no hay ninguna versión
+        ruta: Archivo de la base (usa CACHE_COMPARTIDO_DB por defecto)
+        
+    Returns:
+        tuple: (datos, segundos desde su publicación); la antigüedad es
+            None si la renovación falló y no hay ninguna versión publicada
+    """
+    while True:
+        version, edad, datos = leer(clave, ruta)
+        if datos is not None and edad <= vigencia:
+            return datos, edad
+        
+        # Con un dato anterior disponible no se espera a la renovación en
+        # curso: se sirve ese dato
+        resultado = _renovaciones.ejecutar(
+            (ruta, clave),
+            lambda: _renovar_con_lease(clave, version, renovar, vigencia, duracion_lease, ruta),
+            esperar=datos is None,
+            por_defecto=(datos, edad) if datos is not None else None
+        )
+        if resultado is not None:
+            return resultado
+        
+        if datos is not None:
+            # Otro proceso está renovando: se sirve la versión anterior
+            return datos, edad
+        
+        time.sleep(espera)
+
+
+def _bucle_renovador(clave, renovar, vigencia, duracion_lease, intervalo, ruta):
+    """Renueva el dato cuando le quedan menos de 'intervalo' segundos de vigencia."""
+    while True:
+        try:
+            version, edad, datos = leer(clave, ruta)
+            umbral = max(vigencia - intervalo, 0)
+            if datos is None or edad >= umbral:
+                _renovaciones.ejecutar(
+                    (ruta, clave),
+                    lambda: _renovar_con_lease(clave, version, renovar, umbral, duracion_lease, ruta),
+                    esperar=False
+                )
+        except Exception as e:
+            logger.error(f"Error en la renovación en segundo plano de '{clave}': {e}")
+        
+        time.sleep(intervalo)
+
+
+def iniciar_renovador(clave, renovar, vigencia, duracion_lease, intervalo, ruta=None):
+    """
+    Inicia (una vez por proceso) un hilo que renueva el dato antes de que venza.
+    
+    Se puede llamar en cada request: solo el primer llamado de cada proceso
+    crea el hilo. Al identificarse por pid, un worker creado con fork arranca
+    su propio hilo en lugar de heredar uno que no existe. Si hay varios
+    procesos, sus renovadores compiten por el lease y solo uno va al sitio.
+    
+    Args:
+        clave: Nombre del dato
+        renovar: Función sin argumentos que obtiene el dato nuevo
+        vigencia: Segundos durante los que un dato se considera fresco (TTL blando)
+        duracion_lease: Segundos máximos que puede tardar renovar()
+        intervalo: Segundos entre revisiones; el dato se renueva cuando le
+            queda menos que esto de vigencia
+        ruta: Archivo de la base (usa CACHE_COMPARTIDO_DB por defecto)
+    """
+    identificador = (os.getpid(), ruta, clave)
+    if identificador in _renovadores:
+        return
+    
+    with _lock_renovadores:
+        if identificador in _renovadores:
+            return
+        
+        hilo = threading.Thread(
+            target=_bucle_renovador,
+            args=(clave, renovar, vigencia, duracion_lease, intervalo, ruta),
+            name=f'renovador-{clave}',
+            daemon=True
+        )
+        hilo.start()
+        _renovadores[identificador] = hilo
+    
+    logger.info(f"Renovador en segundo plano de '{clave}' iniciado (cada {intervalo} s)")
+
+
+def estado_cache(clave, ruta=None):
+    """
+    Versión y antigüedad del dato compartido, para el health check.
+    
+    Args:
+        clave: Nombre del dato
+        ruta: Archivo de la base (usa CACHE_COMPARTIDO_DB por defecto)
+        
+    Returns:
+        dict: version, edad_segundos, si hay un lease vigente y los
+            contadores de renovaciones de este proceso (ejecutadas y
+            solicitudes coalescidas)
+    """
+    fila = _conectar(ruta).execute(
+        "SELECT version, actualizado, lease_vence FROM snapshots WHERE clave = ?", (clave,)
+    ).fetchone()
+    if fila is None:
+        fila = (0, 0, 0)
+    
+    ahora = time.time()
+    return {
+        'version': fila[0],
+        'edad_segundos': round(ahora - fila[1], 1) if fila[0] else None,
+        'renovando': fila[2] > ahora,
+        'renovaciones': _renovaciones.estadisticas()
+    }
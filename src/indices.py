@@ -0,0 +1,557 @@
+import difflib
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import BUSQUEDA_CACHE_SIZE
+from src.utils import VueloUnico
+from src.tokenizador_js import COLUMNAS_ESTACIONES, indices_ordenados, tabla_desde_dicts
+from src.interpolacion import grilla_idw
+
+
+# Radio medio de la Tierra (km)
+RADIO_TIERRA_KM = 6371.0088
+
+# Lado de cada celda de la grilla espacial, en grados. La provincia ocupa
+# unos 4° x 3°: con 0.25° cada celda tiene pocas estaciones
+TAMANO_CELDA = 0.25
+
+# Campos que puede tener cada estación ('detalle' solo si se pidió)
+CAMPOS_ESTACION = COLUMNAS_ESTACIONES + ('detalle',)
+
+
+def distancia_km(lat1, lon1, lat2, lon2):
+    """
+    Distancia sobre la superficie terrestre (fórmula de haversine).
+    
+    Args:
+        lat1, lon1: Coordenadas del primer punto (grados)
+        lat2, lon2: Coordenadas del segundo punto (grados)
+        
+    Returns:
+        float: Distancia en kilómetros
+    """
+    fi1, fi2 = math.radians(lat1), math.radians(lat2)
+    delta_fi = fi2 - fi1
+    delta_lambda = math.radians(lon2 - lon1)
+    a = math.sin(delta_fi / 2) ** 2 + math.cos(fi1) * math.cos(fi2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class IndiceEspacial:
+    """
+    Grilla uniforme de estaciones por latitud y longitud.
+    
+    Cada celda guarda las estaciones que caen en ella, así que las consultas
+    solo revisan las celdas cercanas al punto o dentro del rectángulo en
+    lugar de recorrer la lista completa. Las estaciones sin coordenadas no
+    se indexan.
+    """
+    
+    def __init__(self, estaciones, tamano_celda=TAMANO_CELDA):
+        self.tamano = tamano_celda
+        self.celdas = {}
+        self.puntos = []
+        latitud_maxima = 0.0
+        
+        for estacion in estaciones:
+            lat, lon = estacion.get('latitud'), estacion.get('longitud')
+            if lat is None or lon is None:
+                continue
+            self.celdas.setdefault(self._celda(lat, lon), []).append((lat, lon, estacion))
+            self.puntos.append((lat, lon, estacion))
+            latitud_maxima = max(latitud_maxima, abs(lat))
+        self.total = len(self.puntos)
+        
+        if self.celdas:
+            filas = [f for f, _ in self.celdas]
+            columnas = [c for _, c in self.celdas]
+            self._limites = (min(filas), max(filas), min(columnas), max(columnas))
+        else:
+            self._limites = None
+        self._latitud_maxima = latitud_maxima
+    
+    def _celda(self, lat, lon):
+        return math.floor(lat / self.tamano), math.floor(lon / self.tamano)
+    
+    def _anillo(self, fila, columna, radio):
+        """Celdas (no vacías) a exactamente 'radio' celdas de distancia."""
+        if radio == 0:
+            celda = self.celdas.get((fila, columna))
+            if celda:
+                yield celda
+            return
+        
+        # Solo las filas y columnas dentro de los límites ocupados
+        fila_min, fila_max, col_min, col_max = self._limites
+        for f in range(max(fila - radio, fila_min), min(fila + radio, fila_max) + 1):
+            if f in (fila - radio, fila + radio):
+                columnas = range(max(columna - radio, col_min), min(columna + radio, col_max) + 1)
+            else:
+                columnas = [c for c in (columna - radio, columna + radio) if col_min <= c <= col_max]
+            for c in columnas:
+                celda = self.celdas.get((f, c))
+                if celda:
+                    yield celda
+    
+    def _cercanas_lineal(self, lat, lon, k, radio_km):
+        """Recorre todas las estaciones; para puntos fuera de la grilla ocupada."""
+        candidatas = []
+        for lat_e, lon_e, estacion in self.puntos:
+            distancia = distancia_km(lat, lon, lat_e, lon_e)
+            if radio_km is None or distancia <= radio_km:
+                candidatas.append((distancia, estacion))
+        
+        candidatas.sort(key=lambda x: x[0])
+        return candidatas[:k]
+    
+    def cercanas(self, lat, lon, k=5, radio_km=None):
+        """
+        Estaciones más cercanas a un punto.
+        
+        Recorre anillos de celdas alrededor del punto hasta que ninguna
+        celda sin revisar pueda tener una estación más cercana que la
+        k-ésima encontrada. Un punto fuera de la zona ocupada por las
+        estaciones (ej: lejos de la provincia) se resuelve recorriendo la
+        lista, para que el costo no crezca con la distancia.
+        
+        Args:
+            lat: Latitud del punto (grados)
+            lon: Longitud del punto (grados)
+            k: Cantidad máxima de estaciones
+            radio_km: Distancia máxima opcional
+            
+        Returns:
+            list: Tuplas (distancia_km, estacion), de la más cercana a la más lejana
+        """
+        if not self._limites or k <= 0:
+            return []
+        
+        fila, columna = self._celda(lat, lon)
+        fila_min, fila_max, col_min, col_max = self._limites
+        if not (fila_min <= fila <= fila_max and col_min <= columna <= col_max):
+            return self._cercanas_lineal(lat, lon, k, radio_km)
+        
+        radio_maximo = max(
+            abs(fila - fila_min), abs(fila - fila_max),
+            abs(columna - col_min), abs(columna - col_max)
+        )
+        
+        # Cota inferior de la distancia a una celda a más de 'radio' anillos
+        # (un grado de longitud mide menos cuanto más lejos del ecuador)
+        factor = min(1.0, math.cos(math.radians(max(self._latitud_maxima, abs(lat)))))
+        km_por_anillo = math.radians(self.tamano) * RADIO_TIERRA_KM * factor
+        
+        candidatas = []
+        for radio in range(radio_maximo + 1):
+            for celda in self._anillo(fila, columna, radio):
+                for lat_e, lon_e, estacion in celda:
+                    distancia = distancia_km(lat, lon, lat_e, lon_e)
+                    if radio_km is None or distancia <= radio_km:
+                        candidatas.append((distancia, estacion))
+            
+            cota = radio * km_por_anillo
+            if radio_km is not None and cota > radio_km:
+                break
+            if len(candidatas) >= k:
+                candidatas.sort(key=lambda x: x[0])
+                del candidatas[k:]
+                if candidatas[-1][0] <= cota:
+                    break
+        
+        candidatas.sort(key=lambda x: x[0])
+        return candidatas[:k]
+    
+    def en_rectangulo(self, lat_min, lon_min, lat_max, lon_max):
+        """
+        Estaciones dentro de un rectángulo de coordenadas (bordes incluidos).
+        
+        Args:
+            lat_min, lon_min: Esquina sudoeste (grados)
+            lat_max, lon_max: Esquina noreste (grados)
+            
+        Returns:
+            list: Estaciones dentro del rectángulo, de norte a sur
+        """
+        if not self._limites or lat_min > lat_max or lon_min > lon_max:
+            return []
+        
+        fila_min, col_min = self._celda(lat_min, lon_min)
+        fila_max, col_max = self._celda(lat_max, lon_max)
+        
+        # Solo las celdas que existen dentro del rectángulo
+        limite_fila_min, limite_fila_max, limite_col_min, limite_col_max = self._limites
+        fila_min, fila_max = max(fila_min, limite_fila_min), min(fila_max, limite_fila_max)
+        col_min, col_max = max(col_min, limite_col_min), min(col_max, limite_col_max)
+        
+        encontradas = []
+        for f in range(fila_min, fila_max + 1):
+            for c in range(col_min, col_max + 1):
+                for lat, lon, estacion in self.celdas.get((f, c), ()):
+                    if lat_min <= lat <= lat_max and lon_min <= lon <= lon_max:
+                        encontradas.append((lat, lon, estacion))
+        
+        encontradas.sort(key=lambda x: (-x[0], x[1]))
+        return [estacion for _, _, estacion in encontradas]
+
+
+# Puntaje de cada tipo de coincidencia por nombre; las aproximadas
+# (errores de tipeo) multiplican su similitud por PUNTAJE_APROXIMADO
+PUNTAJE_EXACTO = 1.0
+PUNTAJE_PREFIJO = 0.95
+PUNTAJE_PREFIJO_PALABRA = 0.9
+PUNTAJE_SUBCADENA = 0.85
+PUNTAJE_APROXIMADO = 0.8
+
+# Similitud mínima (0 a 1) para aceptar una coincidencia aproximada
+SIMILITUD_MINIMA = 0.7
+
+# Candidatas por trigramas que se comparan con difflib en cada búsqueda
+MAX_CANDIDATAS_APROXIMADAS = 20
+
+_NO_ALFANUMERICO = re.compile(r'[^\w\s]')
+
+
+def normalizar_nombre(texto):
+    """
+    Normaliza un nombre para compararlo sin acentos, mayúsculas ni signos.
+    
+    Args:
+        texto: Nombre o consulta (ej: "Unión")
+        
+    Returns:
+        str: Texto normalizado (ej: "union")
+    """
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(_NO_ALFANUMERICO.sub(' ', sin_acentos.casefold()).split())
+
+
+def _trigramas(texto):
+    """Trigramas de un texto normalizado, con relleno para marcar el inicio y el fin."""
+    relleno = f"  {texto} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceNombres:
+    """
+    Búsqueda de estaciones por nombre, sin distinguir acentos ni mayúsculas.
+    
+    Los nombres se normalizan una vez al construir el índice. Las consultas
+    se resuelven con un diccionario de nombres exactos, una lista ordenada
+    de sufijos que empiezan en cada palabra (prefijos por bisección) y un
+    índice de trigramas que acota las candidatas para subcadenas y errores
+    de tipeo. Las últimas consultas quedan en una cache LRU.
+    """
+    
+    def __init__(self, estaciones, tamano_cache=BUSQUEDA_CACHE_SIZE):
+        self.estaciones = [e for e in estaciones if e.get('nombre')]
+        self.normalizados = [normalizar_nombre(e['nombre']) for e in self.estaciones]
+        self.exactos = {}
+        self.trigramas = {}
+        sufijos = []
+        
+        for i, nombre in enumerate(self.normalizados):
+            self.exactos.setdefault(nombre, i)
+            for inicio in [0] + [m.end() for m in re.finditer(' ', nombre)]:
+                sufijos.append((nombre[inicio:], i, inicio == 0))
+            for trigrama in _trigramas(nombre):
+                self.trigramas.setdefault(trigrama, []).append(i)
+        
+        sufijos.sort()
+        self._sufijos = sufijos
+        self._claves_sufijos = [s[0] for s in sufijos]
+        
+        self.tamano_cache = tamano_cache
+        self._cache = OrderedDict()
+        self._lock_cache = threading.Lock()
+    
+    def _por_prefijo(self, consulta):
+        """Índices cuyo nombre (o alguna de sus palabras) empieza con la consulta."""
+        encontrados = {}
+        posicion = bisect_left(self._claves_sufijos, consulta)
+        while posicion < len(self._sufijos) and self._claves_sufijos[posicion].startswith(consulta):
+            _, i, desde_inicio = self._sufijos[posicion]
+            puntaje = PUNTAJE_PREFIJO if desde_inicio else PUNTAJE_PREFIJO_PALABRA
+            encontrados[i] = max(encontrados.get(i, 0), puntaje)
+            posicion += 1
+        return encontrados
+    
+    def _candidatas(self, consulta):
+        """Índices que comparten trigramas con la consulta, de más a menos compartidos."""
+        conteo = {}
+        for trigrama in _trigramas(consulta):
+            for i in self.trigramas.get(trigrama, ()):
+                conteo[i] = conteo.get(i, 0) + 1
+        return sorted(conteo, key=lambda i: (-conteo[i], i))
+    
+    def _similitud(self, consulta, nombre):
+        """Similitud contra el nombre completo o el tramo de palabras de igual largo."""
+        comparador = difflib.SequenceMatcher(None, b=consulta, autojunk=False)
+        palabras = nombre.split()
+        largo = len(consulta.split())
+        tramos = {nombre} | {
+            ' '.join(palabras[i:i + largo]) for i in range(max(len(palabras) - largo + 1, 1))
+        }
+        
+        mejor = 0.0
+        for tramo in tramos:
+            comparador.set_seq1(tramo)
+            # Las cotas rápidas descartan tramos sin calcular ratio()
+            if comparador.real_quick_ratio() > mejor and comparador.quick_ratio() > mejor:
+                mejor = max(mejor, comparador.ratio())
+        return mejor
+    
+    def _resolver(self, consulta, limite):
+        puntajes = {}
+        
+        exacto = self.exactos.get(consulta)
+        if exacto is not None:
+            puntajes[exacto] = PUNTAJE_EXACTO
+        
+        for i, puntaje in self._por_prefijo(consulta).items():
+            puntajes.setdefault(i, puntaje)
+        
+        # Con menos de tres letras los trigramas no acotan: se revisan todas
+        if len(consulta) < 3:
+            candidatas = range(len(self.normalizados))
+        else:
+            candidatas = self._candidatas(consulta)
+        
+        aproximadas = 0
+        for i in candidatas:
+            if i in puntajes:
+                continue
+            nombre = self.normalizados[i]
+            if consulta in nombre:
+                puntajes[i] = PUNTAJE_SUBCADENA
+            elif len(consulta) >= 3 and aproximadas < MAX_CANDIDATAS_APROXIMADAS:
+                aproximadas += 1
+                similitud = self._similitud(consulta, nombre)
+                if similitud >= SIMILITUD_MINIMA:
+                    puntajes[i] = round(similitud * PUNTAJE_APROXIMADO, 3)
+        
+        # Empates: primero el nombre de largo más parecido a la consulta
+        orden = sorted(
+            puntajes,
+            key=lambda i: (-puntajes[i], abs(len(self.normalizados[i]) - len(consulta)), i)
+        )[:limite]
+        return tuple((puntajes[i], self.estaciones[i]) for i in orden)
+    
+    def buscar(self, consulta, limite=5):
+        """
+        Busca estaciones por nombre, de la mejor coincidencia a la peor.
+        
+        Orden: nombre exacto, nombre que empieza con la consulta, alguna
+        palabra que empieza con la consulta, subcadena y, por último,
+        nombres parecidos (errores de tipeo).
+        
+        Args:
+            consulta: Nombre o parte del nombre (ej: "union", "Villa Merc")
+            limite: Cantidad máxima de resultados
+            
+        Returns:
+            list: Tuplas (puntaje, estacion) con puntaje entre 0 y 1
+        """
+        consulta = normalizar_nombre(consulta)
+        if not consulta or limite <= 0:
+            return []
+        
+        clave = (consulta, limite)
+        with self._lock_cache:
+            resultado = self._cache.get(clave)
+            if resultado is not None:
+                self._cache.move_to_end(clave)
+                return list(resultado)
+        
+        resultado = self._resolver(consulta, limite)
+        
+        with self._lock_cache:
+            self._cache[clave] = resultado
+            while len(self._cache) > self.tamano_cache:
+                self._cache.popitem(last=False)
+        
+        return list(resultado)
+    
+    def mejor(self, consulta):
+        """
+        Retorna la estación que mejor coincide con la consulta.
+        
+        Args:
+            consulta: Nombre o parte del nombre
+            
+        Returns:
+            dict: Datos de la estación o None si ninguna coincide
+        """
+        resultados = self.buscar(consulta, limite=1)
+        return resultados[0][1] if resultados else None
+
+
+class IndicesSnapshot:
+    """Índices de las estaciones de un snapshot, construidos una sola vez."""
+    
+    def __init__(self, clima):
+        estaciones = clima.get('estaciones') or []
+        self.estaciones = estaciones
+        self.espacial = IndiceEspacial(estaciones)
+        self.nombres = IndiceNombres(estaciones)
+        # Los ids llegan como texto en la URL: se indexan también así
+        self.por_id = {}
+        for estacion in estaciones:
+            if estacion.get('id') is not None:
+                self.por_id.setdefault(estacion['id'], estacion)
+                self.por_id.setdefault(str(estacion['id']), estacion)
+        
+        # Vista columnar de lo que usan el orden y los filtros: la posición i
+        # de cada columna es la estación i del snapshot
+        self.tabla = tabla_desde_dicts(estaciones, ('id', 'temperatura', 'precipitacion'))
+        temperaturas = self.tabla['temperatura']
+        
+        # Posiciones con temperatura, de la más alta a la más baja (el orden
+        # de /api/estaciones), y sus temperaturas negadas para acotar rangos
+        # con bisect sin recorrer la lista
+        self.por_temperatura = indices_ordenados(self.tabla, 'temperatura', descendente=True)
+        self._claves_temperatura = [-temperaturas[i] for i in self.por_temperatura]
+        self.con_lluvia = frozenset(
+            i for i, precipitacion in enumerate(self.tabla['precipitacion']) if (precipitacion or 0) > 0
+        )
+        
+        # Huella de lo que define el orden y los filtros: un cursor de
+        # paginación solo vale mientras no cambie
+        self.huella = hashlib.sha256(json.dumps(self.tabla).encode('utf-8')).hexdigest()[:12]
+        
+        # Grillas de temperatura interpoladas, por resolución (una de
+        # interpolacion.RESOLUCIONES, así que son pocas)
+        self._grillas = {}
+        self._lock_grillas = threading.Lock()
+        self._calculos_grilla = VueloUnico()
+    
+    def grilla_temperatura(self, resolucion):
+        """
+        Grilla de temperatura interpolada (IDW) del snapshot, calculada una
+        sola vez por resolución.
+        
+        El cálculo se hace fuera del lock: los pedidos de una misma
+        resolución esperan al que la está calculando y los de otras
+        resoluciones no se bloquean.
+        
+        Args:
+            resolucion: Lado de cada celda en grados (ver ajustar_resolucion)
+            
+        Returns:
+            dict: Resultado de grilla_idw, o None si no hay temperaturas
+            
+        Raises:
+            RuntimeError: Si NumPy no está instalado
+        """
+        with self._lock_grillas:
+            if resolucion in self._grillas:
+                return self._grillas[resolucion]
+        
+        return self._calculos_grilla.ejecutar(resolucion, lambda: self._calcular_grilla(resolucion))
+    
+    def _calcular_grilla(self, resolucion):
+        with self._lock_grillas:
+            if resolucion in self._grillas:
+                return self._grillas[resolucion]
+        
+        grilla = grilla_idw(self.estaciones, resolucion)
+        with self._lock_grillas:
+            self._grillas[resolucion] = grilla
+        return grilla
+    
+    def filtrar(self, temp_min=None, temp_max=None, con_lluvia=None, orden='temperatura'):
+        """
+        Posiciones (en la lista del snapshot) de las estaciones que cumplen
+        los filtros.
+        
+        Args:
+            temp_min: Temperatura mínima, inclusive
+            temp_max: Temperatura máxima, inclusive
+            con_lluvia: True (solo con precipitación), False (solo sin) o None
+            orden: 'temperatura' (descendente, solo estaciones con
+                temperatura) u 'original' (el orden del snapshot)
+                
+        Returns:
+            list: Posiciones de las estaciones
+        """
+        if orden == 'original' and temp_min is None and temp_max is None:
+            posiciones = range(len(self.estaciones))
+        else:
+            claves = self._claves_temperatura
+            desde = 0 if temp_max is None else bisect_left(claves, -temp_max)
+            hasta = len(claves) if temp_min is None else bisect_right(claves, -temp_min)
+            posiciones = self.por_temperatura[desde:hasta]
+            if orden == 'original':
+                posiciones.sort()
+        
+        if con_lluvia is not None:
+            return [i for i in posiciones if (i in self.con_lluvia) == con_lluvia]
+        return list(posiciones)
+    
+    def resolver_lote(self, ids=(), nombres=()):
+        """
+        Resuelve varias estaciones de una vez, por id o por nombre.
+        
+        Args:
+            ids: Ids de estación (int o str)
+            nombres: Nombres o partes de nombres (se usa la mejor coincidencia)
+            
+        Returns:
+            tuple: (estaciones encontradas sin repetir, en el orden pedido;
+                dict con los 'ids' y 'nombres' que no se encontraron)
+        """
+        encontradas = []
+        vistas = set()
+        no_encontradas = {'ids': [], 'nombres': []}
+        
+        pedidos = [('ids', i, self.por_id.get(i)) for i in ids]
+        pedidos += [('nombres', n, self.nombres.mejor(n)) for n in nombres]
+        
+        for tipo, pedido, estacion in pedidos:
+            if estacion is None:
+                no_encontradas[tipo].append(pedido)
+            elif id(estacion) not in vistas:
+                vistas.add(id(estacion))
+                encontradas.append(estacion)
+        
+        return encontradas, no_encontradas
+
+
+# Índices del snapshot actual. La cache compartida retorna el mismo objeto
+# mientras no cambie la versión, así que se compara por identidad.
+_indices = {'clima': None, 'indices': None}
+_lock_indices = threading.Lock()
+
+
+def indices_de(clima):
+    """
+    Retorna los índices de un snapshot, construyéndolos solo la primera vez.
+    
+    Args:
+        clima: Datos retornados por obtener_clima o la cache compartida
+        
+    Returns:
+        IndicesSnapshot: Índices de sus estaciones
+    """
+    with _lock_indices:
+        if _indices['clima'] is clima:
+            return _indices['indices']
+    
+    indices = IndicesSnapshot(clima)
+    
+    with _lock_indices:
+        _indices['clima'] = clima
+        _indices['indices'] = indices
+    
+    return indices
@@ -0,0 +1,177 @@
+import math
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # Dependencia opcional: sin ella no hay grilla interpolada
+    np = None
+
+
+# Resoluciones de la grilla (grados por celda) que se calculan. Cualquier
+# otra se ajusta a la más cercana, así que por snapshot hay a lo sumo una
+# grilla por valor de esta lista
+RESOLUCIONES = (0.01, 0.02, 0.05, 0.1, 0.25, 0.5)
+RESOLUCION_POR_DEFECTO = 0.05
+RESOLUCION_MINIMA = RESOLUCIONES[0]
+RESOLUCION_MAXIMA = RESOLUCIONES[-1]
+
+# Margen alrededor de las estaciones que cubre la grilla (grados)
+MARGEN_GRILLA = 0.1
+
+# Exponente de la distancia en la ponderación (IDW clásico: 2)
+POTENCIA_IDW = 2
+
+# Máximo de celdas x estaciones que se calculan por bloque de filas, para
+# acotar la memoria de las matrices de distancias
+ELEMENTOS_POR_BLOQUE = 2_000_000
+
+# Encabezado del formato binario: filas, columnas (uint16), latitud norte,
+# longitud oeste y resolución (float32), little-endian
+ENCABEZADO_BINARIO = struct.Struct('<HHfff')
+
+# Los valores binarios van en décimas de grado (int16), la misma precisión
+# que la versión JSON
+ESCALA_BINARIA = 10
+
+
+def numpy_disponible():
+    """bool: Si NumPy está instalado."""
+    return np is not None
+
+
+def ajustar_resolucion(resolucion):
+    """
+    Ajusta una resolución pedida a la más cercana de RESOLUCIONES.
+    
+    Args:
+        resolucion: Grados por celda
+        
+    Returns:
+        float: Elemento de RESOLUCIONES
+    """
+    return min(RESOLUCIONES, key=lambda r: abs(math.log(r / resolucion)))
+
+
+def grilla_idw(estaciones, resolucion=RESOLUCION_POR_DEFECTO, potencia=POTENCIA_IDW):
+    """
+    Interpola la temperatura de las estaciones sobre una grilla regular por
+    ponderación inversa a la distancia (IDW).
+    
+    El cálculo es vectorizado: las distancias de todas las celdas de un
+    bloque de filas a todas las estaciones se calculan como una matriz, con
+    la aproximación equirectangular (suficiente a escala provincial).
+    
+    Args:
+        estaciones: Lista de estaciones (usa las que tienen coordenadas y
+            temperatura)
+        resolucion: Lado de cada celda en grados
+        potencia: Exponente de la distancia en la ponderación
+        
+    Returns:
+        dict: 'lat_norte', 'lon_oeste', 'resolucion', 'filas', 'columnas' y
+            'valores' (matriz float32 filas x columnas, de norte a sur y de
+            oeste a este); None si no hay estaciones con temperatura
+            
+    Raises:
+        RuntimeError: Si NumPy no está instalado
+    """
+    if np is None:
+        raise RuntimeError('NumPy no está instalado')
+    
+    validas = [
+        e for e in estaciones
+        if e.get('latitud') is not None and e.get('longitud') is not None
+        and e.get('temperatura') is not None
+    ]
+    if not validas:
+        return None
+    
+    latitudes = np.array([e['latitud'] for e in validas], dtype=np.float64)
+    longitudes = np.array([e['longitud'] for e in validas], dtype=np.float64)
+    temperaturas = np.array([e['temperatura'] for e in validas], dtype=np.float64)
+    
+    lat_norte = float(latitudes.max()) + MARGEN_GRILLA
+    lat_sur = float(latitudes.min()) - MARGEN_GRILLA
+    lon_oeste = float(longitudes.min()) - MARGEN_GRILLA
+    lon_este = float(longitudes.max()) + MARGEN_GRILLA
+    filas = int(math.ceil((lat_norte - lat_sur) / resolucion)) + 1
+    columnas = int(math.ceil((lon_este - lon_oeste) / resolucion)) + 1
+    
+    # Centros de celda; la longitud se escala por el coseno de la latitud media
+    lat_celdas = lat_norte - resolucion * np.arange(filas)
+    lon_celdas = lon_oeste + resolucion * np.arange(columnas)
+    escala = math.cos(math.radians((lat_norte + lat_sur) / 2))
+    x_estaciones = longitudes * escala
+    x_celdas = lon_celdas * escala
+    
+    valores = np.empty((filas, columnas), dtype=np.float32)
+    dx2 = (x_celdas[:, None] - x_estaciones[None, :]) ** 2  # columnas x estaciones
+    filas_por_bloque = max(1, ELEMENTOS_POR_BLOQUE // (columnas * len(validas)))
+    
+    for inicio in range(0, filas, filas_por_bloque):
+        fin = min(inicio + filas_por_bloque, filas)
+        dy2 = (lat_celdas[inicio:fin, None] - latitudes[None, :]) ** 2  # filas x estaciones
+        distancia2 = dy2[:, None, :] + dx2[None, :, :]  # filas x columnas x estaciones
+        
+        # Una celda sobre una estación toma su valor (evita dividir por cero)
+        exactas = distancia2 == 0
+        with np.errstate(divide='ignore'):
+            pesos = np.where(exactas, 0.0, distancia2 ** (-potencia / 2))
+        interpolado = (pesos @ temperaturas) / pesos.sum(axis=2)
+        
+        hay_exacta = exactas.any(axis=2)
+        if hay_exacta.any():
+            interpolado[hay_exacta] = temperaturas[exactas.argmax(axis=2)[hay_exacta]]
+        
+        valores[inicio:fin] = interpolado
+    
+    return {
+        'lat_norte': lat_norte,
+        'lon_oeste': lon_oeste,
+        'resolucion': resolucion,
+        'filas': filas,
+        'columnas': columnas,
+        'valores': valores
+    }
+
+
+def grilla_a_json(grilla):
+    """
+    Representación JSON de una grilla, con valores redondeados a décimas.
+    
+    Args:
+        grilla: Resultado de grilla_idw
+        
+    Returns:
+        dict: Metadatos de la grilla y 'valores' como lista de filas
+    """
+    return {
+        'lat_norte': round(grilla['lat_norte'], 6),
+        'lon_oeste': round(grilla['lon_oeste'], 6),
+        'resolucion': grilla['resolucion'],
+        'filas': grilla['filas'],
+        'columnas': grilla['columnas'],
+        'valores': np.round(grilla['valores'].astype(np.float64), 1).tolist()
+    }
+
+
+def grilla_a_binario(grilla):
+    """
+    Representación binaria compacta de una grilla.
+    
+    Formato: ENCABEZADO_BINARIO (16 bytes) seguido de filas x columnas
+    int16 little-endian en décimas de grado (ESCALA_BINARIA), por filas de
+    norte a sur y de oeste a este.
+    
+    Args:
+        grilla: Resultado de grilla_idw
+        
+    Returns:
+        bytes: Grilla serializada
+    """
+    encabezado = ENCABEZADO_BINARIO.pack(
+        grilla['filas'], grilla['columnas'],
+        grilla['lat_norte'], grilla['lon_oeste'], grilla['resolucion']
+    )
+    decimas = np.round(grilla['valores'].astype(np.float64) * ESCALA_BINARIA).astype('<i2')
+    return encabezado + decimas.tobytes()
@@ -0,0 +1,132 @@
+import re
+
+
+# Errores de tipeo frecuentes en los nombres de los días -> forma correcta
+DIAS_CORREGIDOS = {
+    'vienes': 'Viernes',
+    'miercoles': 'Miércoles',
+    'miércoles': 'Miércoles',
+    'sabado': 'Sábado',
+    'sábado': 'Sábado'
+}
+
+PATRON_TYPOS_DIAS = re.compile(r'\b(?:Vienes|Miercoles|Sabado)\b', re.IGNORECASE)
+
+# Encabezado de cada día del pronóstico extendido: "Jueves 29 de enero de 2026"
+PATRON_DIA_EXTENDIDO = re.compile(
+    r'(Domingo|Lunes|Martes|Mi[ée]rcoles|Jueves|Viernes|Vienes|S[áa]bado)\s+(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})',
+    re.IGNORECASE
+)
+
+# Temperatura sin contexto: "31°C", "15º"
+_TEMPERATURA = r'(?P<temp>\d+)(?-i:[°ºC])'
+
+
+def _patron_temperaturas(minima, maxima):
+    """
+    Combina los contextos de mínima y máxima con la temperatura suelta en
+    una sola alternativa, para recorrer el texto una única vez.
+    """
+    return re.compile(
+        rf'{minima}\s*(?P<min>\d+)[°º]|{maxima}\s*(?P<max>\d+)[°º]|{_TEMPERATURA}',
+        re.IGNORECASE
+    )
+
+
+# Patrones de temperatura por tipo de bloque de pronóstico
+PATRONES_TEMPERATURA = {
+    'hoy': _patron_temperaturas(
+        r'(?:m[íi]nimas?|m[íi]nima|mín\.|min\.|estarán en torno a los)\s*(?:de|en torno a|serán de)?',
+        r'(?:m[áa]ximas?|m[áa]xima|m[áa]x\.|max\.|alcanzarán)\s*(?:de|los|serán de)?'
+    ),
+    'extendido': _patron_temperaturas(
+        r'(?:m[íi]nimas?|m[íi]nima|mín\.|min\.)\s*(?:ser[áa]n?|de|est[áa]n?)?\s*de?',
+        r'(?:m[áa]ximas?|m[áa]xima|m[áa]x\.|max\.)\s*(?:ser[áa]n?|de|est[áa]n?|alcanzar[áa]n?)?\s*de?'
+    )
+}
+
+
+def corregir_dias(texto):
+    """
+    Corrige en una sola pasada los errores de tipeo en nombres de días
+    (ej: "Vienes" -> "Viernes").
+    
+    Args:
+        texto: Texto del pronóstico
+        
+    Returns:
+        str: Texto corregido
+    """
+    return PATRON_TYPOS_DIAS.sub(lambda m: DIAS_CORREGIDOS[m.group(0).lower()], texto)
+
+
+def normalizar_dia(nombre):
+    """
+    Normaliza el nombre de un día encontrado en el pronóstico.
+    
+    Args:
+        nombre: Nombre del día tal como aparece en el texto
+        
+    Returns:
+        str: Nombre corregido (o el mismo si no requiere corrección)
+    """
+    return DIAS_CORREGIDOS.get(nombre.lower(), nombre)
+
+
+def extraer_temperaturas(texto, tipo='hoy'):
+    """
+    Extrae la temperatura mínima y máxima de un bloque de pronóstico.
+    
+    Primero se usan las temperaturas con contexto ("mínimas de 15°C"). Si
+    falta alguna, se completa con las temperaturas sueltas del bloque: con
+    dos o más, la menor es la mínima y la mayor la máxima; con una sola se
+    aplica la regla del tipo de bloque.
+    
+    Args:
+        texto: Texto del bloque
+        tipo: 'hoy' (pronóstico del día) o 'extendido' (un día del extendido)
+        
+    Returns:
+        tuple: (temperatura_minima, temperatura_maxima), cada una int o None
+    """
+    minima = None
+    maxima = None
+    temps = []
+    
+    for match in PATRONES_TEMPERATURA[tipo].finditer(texto):
+        if match.group('min') is not None:
+            valor = int(match.group('min'))
+            if minima is None:
+                minima = valor
+        elif match.group('max') is not None:
+            valor = int(match.group('max'))
+            if maxima is None:
+                maxima = valor
+        else:
+            valor = int(match.group('temp'))
+        temps.append(valor)
+    
+    if minima is not None and maxima is not None:
+        return minima, maxima
+    
+    if len(temps) >= 2:
+        # La menor es mínima, la mayor es máxima
+        if minima is None:
+            minima = min(temps)
+        if maxima is None:
+            maxima = max(temps)
+    elif len(temps) == 1:
+        valor = temps[0]
+        if tipo == 'hoy':
+            if maxima is None:
+                maxima = valor
+        # En el extendido, una sola temperatura solo completa la que falta
+        # si es coherente con la que ya se encontró
+        elif minima is None and maxima is not None:
+            if valor < maxima:
+                minima = valor
+        elif maxima is None and minima is not None:
+            if valor > minima:
+                maxima = valor
+    
+    return minima, maxima
@@ -0,0 +1,253 @@
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.scraper import parsear_pagina
+from src.archivo import es_archivo, iterar_indice, ruta_objeto
+from src.utils import setup_logger, calcular_digest
+
+logger = setup_logger()
+
+EXTENSIONES_HTML = ('.html', '.htm', '.aspx', '.html.gz', '.htm.gz')
+
+
+def _es_pagina(nombre):
+    return nombre.lower().endswith(EXTENSIONES_HTML)
+
+
+def _decodificar(nombre, datos):
+    """Retorna (HTML como texto, tamaño en bytes del HTML sin comprimir)."""
+    if nombre.lower().endswith('.gz'):
+        datos = gzip.decompress(datos)
+    return datos.decode('utf-8', errors='replace'), len(datos)
+
+
+def iterar_paginas(origen):
+    """
+    Recorre las páginas HTML guardadas en un directorio o archivo comprimido.
+    
+    Soporta directorios (recursivo), .tar / .tar.gz / .tgz y .zip; dentro de
+    ellos se toman los archivos .html/.htm/.aspx, opcionalmente .gz. Las
+    páginas se leen de a una, sin cargar el archivo completo en memoria.
+    Para directorios se retorna la ruta y cada proceso lee su archivo.
+    
+    Un directorio del archivo de páginas (src/archivo.py) se recorre en
+    orden de descarga, entregando cada contenido distinto una sola vez.
+    
+    Args:
+        origen: Ruta del directorio o archivo
+        
+    Yields:
+        tuple: (nombre, ruta o None, bytes leídos o None); el contenido se
+            decodifica en reparsear_pagina
+    """
+    if os.path.isdir(origen) and es_archivo(origen):
+        vistas = set()
+        for fecha, digest, _ in iterar_indice(origen):
+            if digest not in vistas:
+                vistas.add(digest)
+                yield f"{fecha.isoformat()} {digest}", ruta_objeto(digest, origen), None
+    
+    elif os.path.isdir(origen):
+        for raiz, _, archivos in os.walk(origen):
+            for nombre in sorted(archivos):
+                if _es_pagina(nombre):
+                    ruta = os.path.join(raiz, nombre)
+                    yield os.path.relpath(ruta, origen), ruta, None
+    
+    elif zipfile.is_zipfile(origen):
+        with zipfile.ZipFile(origen) as archivo:
+            for info in archivo.infolist():
+                if not info.is_dir() and _es_pagina(info.filename):
+                    yield info.filename, None, archivo.read(info)
+    
+    elif tarfile.is_tarfile(origen):
+        # Modo stream: los miembros se leen en orden, sin índice en memoria
+        with tarfile.open(origen, 'r|*') as archivo:
+            for miembro in archivo:
+                if miembro.isfile() and _es_pagina(miembro.name):
+                    datos = archivo.extractfile(miembro).read()
+                    yield miembro.name, None, datos
+    
+    else:
+        raise ValueError(f"No se reconoce el origen {origen} (se espera directorio, .tar o .zip)")
+
+
+def _inicializar_proceso():
+    """Silencia los warnings por página en los procesos del pool."""
+    logging.getLogger('clima_san_luis').setLevel(logging.ERROR)
+
+
+def reparsear_pagina(nombre, ruta=None, contenido=None):
+    """
+    Extrae pronóstico y estaciones de una página guardada.
+    
+    Args:
+        nombre: Identificador de la página (ruta relativa o miembro del archivo)
+        ruta: Archivo a leer, si no se pasa el contenido
+        contenido: Bytes ya leídos de un .tar o .zip (comprimidos con gzip
+            si el nombre termina en .gz)
+        
+    Returns:
+        dict: Registro para la salida NDJSON (con 'error' si falló); 'bytes'
+            es el tamaño del HTML sin comprimir, no la cantidad de caracteres
+    """
+    tamano = 0
+    try:
+        if contenido is None:
+            with open(ruta, 'rb') as f:
+                html, tamano = _decodificar(ruta, f.read())
+        else:
+            html, tamano = _decodificar(nombre, contenido)
+        
+        pagina = parsear_pagina(html)
+        
+        return {
+            'archivo': nombre,
+            'digest': calcular_digest(html),
+            'bytes': tamano,
+            'pronostico_general': pagina['pronostico_general'],
+            'estaciones': pagina['estaciones'],
+            'error': None
+        }
+    except Exception as e:
+        return {
+            'archivo': nombre,
+            'bytes': tamano,
+            'error': str(e)
+        }
+
+
+def reparsear(origen, salida, procesos=None, mostrar_progreso=True):
+    """
+    Re-extrae todas las páginas de un origen usando un pool de procesos.
+    
+    Se mantienen como máximo 4 páginas en vuelo por proceso, así que la
+    memoria no crece con el tamaño del archivo. Los resultados se escriben
+    en el mismo orden en que aparecen las páginas.
+    
+    Args:
+        origen: Directorio o archivo con páginas HTML (ver iterar_paginas)
+        salida: Archivo de texto abierto donde escribir el NDJSON
+        procesos: Cantidad de procesos (usa todos los núcleos por defecto)
+        mostrar_progreso: Si es True, muestra avance y velocidad en stderr
+        
+    Returns:
+        dict: Totales (páginas, errores, bytes, segundos)
+    """
+    procesos = procesos or os.cpu_count() or 1
+    en_vuelo = deque()
+    totales = {'paginas': 0, 'errores': 0, 'bytes': 0, 'segundos': 0.0}
+    inicio = time.monotonic()
+    ultimo_reporte = 0.0
+    
+    def escribir(resultado):
+        nonlocal ultimo_reporte
+        
+        salida.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+        totales['paginas'] += 1
+        totales['bytes'] += resultado.get('bytes', 0)
+        if resultado.get('error'):
+            totales['errores'] += 1
+            logger.warning(f"Error re-parseando {resultado['archivo']}: {resultado['error']}")
+        
+        ahora = time.monotonic()
+        if mostrar_progreso and ahora - ultimo_reporte >= 0.5:
+            ultimo_reporte = ahora
+            transcurrido = max(ahora - inicio, 1e-9)
+            sys.stderr.write(
+                f"\r   {totales['paginas']} páginas | "
+                f"{totales['paginas'] / transcurrido:.1f} pág/s | "
+                f"{totales['bytes'] / transcurrido / 1024 / 1024:.2f} MB/s | "
+                f"{totales['errores']} errores"
+            )
+            sys.stderr.flush()
+    
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_proceso) as executor:
+        for nombre, ruta, contenido in iterar_paginas(origen):
+            en_vuelo.append(executor.submit(reparsear_pagina, nombre, ruta, contenido))
+            
+            if len(en_vuelo) >= procesos * 4:
+                escribir(en_vuelo.popleft().result())
+        
+        while en_vuelo:
+            escribir(en_vuelo.popleft().result())
+    
+    totales['segundos'] = round(time.monotonic() - inicio, 2)
+    
+    if mostrar_progreso:
+        sys.stderr.write('\n')
+    
+    return totales
+
+
+def main():
+    """
+    Función principal con manejo de argumentos.
+    """
+    parser = argparse.ArgumentParser(
+        description='Re-extrae datos de páginas de clima guardadas en paralelo',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Ejemplos de uso:
+  python src/reparseo.py paginas/                       # Salida NDJSON por stdout
+  python src/reparseo.py paginas.tar.gz -o clima.ndjson # Desde un archivo comprimido
+  python src/reparseo.py paginas.zip -p 4 -o clima.ndjson
+  python src/reparseo.py logs/archivo -o clima.ndjson   # Archivo de páginas descargadas
+        '''
+    )
+    
+    parser.add_argument(
+        'origen',
+        help='Directorio, .tar(.gz), .zip o archivo de páginas (logs/archivo)'
+    )
+    
+    parser.add_argument(
+        '--salida', '-o',
+        type=str,
+        default='-',
+        help='Archivo NDJSON de salida (default: stdout)'
+    )
+    
+    parser.add_argument(
+        '--procesos', '-p',
+        type=int,
+        default=None,
+        help='Cantidad de procesos (default: todos los núcleos)'
+    )
+    
+    parser.add_argument(
+        '--silencioso', '-s',
+        action='store_true',
+        help='No mostrar progreso'
+    )
+    
+    args = parser.parse_args()
+    
+    if args.salida == '-':
+        totales = reparsear(args.origen, sys.stdout, args.procesos, not args.silencioso)
+    else:
+        with open(args.salida, 'w', encoding='utf-8') as salida:
+            totales = reparsear(args.origen, salida, args.procesos, not args.silencioso)
+    
+    segundos = max(totales['segundos'], 1e-9)
+    print(
+        f"✅ {totales['paginas']} páginas re-parseadas en {totales['segundos']} s "
+        f"({totales['paginas'] / segundos:.1f} pág/s, {totales['errores']} errores)",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,404 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 import re
 import json
+import contextvars
 import sys
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 # Agregar el directorio raíz al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config.settings import URL_CLIMA, REQUEST_TIMEOUT, REQUEST_HEADERS
-from src.utils import setup_logger, retry, limpiar_texto, guardar_ultimo_clima, cargar_ultimo_clima
+from config.settings import (
+    URL_CLIMA, URL_ESTACION, REQUEST_TIMEOUT, REQUEST_HEADERS, HTTP_POOL_SIZE,
+    INCLUIR_DETALLE_ESTACIONES, DETALLE_ESTACIONES_WORKERS, PARSE_CACHE_SIZE,
+    REQUEST_RETRIES, REQUEST_RETRY_DELAY, REQUEST_RETRY_MAX_DELAY, REQUEST_DEADLINE,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN, ARCHIVAR_PAGINAS
+)
+from src.utils import (
+    setup_logger, retry, limpiar_texto, calcular_digest, presupuesto_restante,
+    CircuitBreaker, guardar_ultimo_clima, cargar_ultimo_clima
+)
+from src.patrones import PATRON_DIA_EXTENDIDO, corregir_dias, normalizar_dia, extraer_temperaturas
+from src.tokenizador_js import tabla_estaciones, filas_como_dicts
+from src.series import registrar_lecturas
+from src.archivo import archivar_pagina
+from src.indices import IndiceNombres
 
 
 logger = setup_logger()
 
+# Circuit breaker de la página principal del sitio de clima
+circuito_upstream = CircuitBreaker(
+    umbral_fallos=CIRCUIT_FAILURE_THRESHOLD,
+    enfriamiento=CIRCUIT_COOLDOWN,
+    nombre='clima.sanluis.gob.ar'
+)
 
-@retry(max_attempts=3, delay=5)
+# Las páginas de detalle de estaciones tienen su propio breaker: una
+# estación que falla no abre el circuito de la página principal, y los
+# detalles que sí responden no ocultan una caída de esa página
+circuito_detalles = CircuitBreaker(
+    umbral_fallos=CIRCUIT_FAILURE_THRESHOLD,
+    enfriamiento=CIRCUIT_COOLDOWN,
+    nombre='clima.sanluis.gob.ar/Estacion.aspx'
+)
+
+# Sesión HTTP compartida (conexiones keep-alive reutilizadas entre scrapings)
+_sesion = None
+_sesion_lock = threading.Lock()
+
+# Validadores de la última descarga por URL (ETag / Last-Modified + cuerpo)
+_descargas = {}
+
+# Cache LRU de resultados de parseo: digest del HTML -> {extractor: resultado}
+_cache_parseo = OrderedDict()
+_cache_parseo_lock = threading.Lock()
+_estadisticas_parseo = {'aciertos': 0, 'fallos': 0}
+
+
+def obtener_sesion():
+    """
+    Retorna la sesión HTTP compartida, creándola la primera vez.
+    
+    La sesión mantiene un pool de conexiones keep-alive, de modo que los
+    scrapings sucesivos no repiten el handshake TLS con el sitio.
+    
+    Returns:
+        requests.Session: Sesión configurada con los headers del proyecto
+    """
+    global _sesion
+    
+    if _sesion is None:
+        with _sesion_lock:
+            if _sesion is None:
+                sesion = requests.Session()
+                sesion.headers.update(REQUEST_HEADERS)
+                adaptador = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                sesion.mount('https://', adaptador)
+                sesion.mount('http://', adaptador)
+                _sesion = sesion
+    
+    return _sesion
+
+
+def estado_upstream():
+    """
+    Retorna el estado del circuit breaker del sitio de clima.
+    
+    Returns:
+        dict: Estado ('cerrado', 'abierto', 'semiabierto'), fallos
+            consecutivos y segundos hasta el próximo intento
+    """
+    return circuito_upstream.estado_actual()
+
+
+def estado_detalles():
+    """
+    Retorna el estado del circuit breaker de las páginas de detalle.
+    
+    Returns:
+        dict: Mismo formato que estado_upstream
+    """
+    return circuito_detalles.estado_actual()
+
+
+def _es_error_transitorio(error):
+    """
+    Indica si vale la pena reintentar una descarga fallida.
+    
+    Los errores 4xx (salvo 429) son respuestas válidas del servidor, no
+    caídas: no se reintentan ni abren el circuito.
+    """
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, requests.RequestException)
+
+
+def _descargar_html(url):
+    """
+    Descarga una página del sitio con la sesión compartida y peticiones
+    condicionales (If-None-Match / If-Modified-Since): si el servidor
+    responde 304 se retorna la copia de la descarga anterior.
+    """
+    logger.info(f"Obteniendo datos de {url}")
+    
+    previa = _descargas.get(url)
+    headers = {}
+    if previa:
+        if previa['etag']:
+            headers['If-None-Match'] = previa['etag']
+        if previa['last_modified']:
+            headers['If-Modified-Since'] = previa['last_modified']
+    
+    response = obtener_sesion().get(
+        url,
+        headers=headers,
+        timeout=presupuesto_restante(REQUEST_TIMEOUT)
+    )
+    
+    if response.status_code == 304 and previa:
+        logger.info("Página sin cambios (304), usando la copia descargada anteriormente")
+        return previa['html']
+    
+    response.raise_for_status()
+    response.encoding = 'utf-8'
+    html = response.text
+    
+    _descargas[url] = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'html': html
+    }
+    
+    return html
+
+
+@retry(
+    max_attempts=REQUEST_RETRIES,
+    delay=REQUEST_RETRY_DELAY,
+    max_delay=REQUEST_RETRY_MAX_DELAY,
+    jitter=True,
+    deadline=REQUEST_DEADLINE,
+    breaker=circuito_upstream,
+    reintentar_si=_es_error_transitorio
+)
 def obtener_html(url=None):
     """
     Obtiene el HTML del sitio web de clima.
     
+    Usa la sesión compartida y peticiones condicionales (If-None-Match /
+    If-Modified-Since): si el servidor responde 304 se retorna la copia
+    de la descarga anterior sin volver a transferir la página.
+    
     Args:
         url: URL a consultar (usa URL_CLIMA por defecto)
         
     Returns:
         str: Contenido HTML de la página
     """
-    if url is None:
-        url = URL_CLIMA
+    return _descargar_html(url or URL_CLIMA)
+
+
+@retry(
+    max_attempts=REQUEST_RETRIES,
+    delay=REQUEST_RETRY_DELAY,
+    max_delay=REQUEST_RETRY_MAX_DELAY,
+    jitter=True,
+    deadline=REQUEST_DEADLINE,
+    breaker=circuito_detalles,
+    reintentar_si=_es_error_transitorio
+)
+def obtener_html_detalle(url):
+    """
+    Obtiene el HTML de una página de detalle (Estacion.aspx).
     
-    logger.info(f"Obteniendo datos de {url}")
+    Igual que obtener_html, pero los fallos cuentan en circuito_detalles
+    y no en el circuito de la página principal.
     
-    response = requests.get(
-        url,
-        headers=REQUEST_HEADERS,
-        timeout=REQUEST_TIMEOUT
-    )
-    response.raise_for_status()
-    response.encoding = 'utf-8'
+    Args:
+        url: URL de la página (ver url_estacion)
+        
+    Returns:
+        str: Contenido HTML de la página
+    """
+    return _descargar_html(url)
+
+
+def _buscar_en_cache_parseo(digest, clave):
+    """Retorna (encontrado, valor) para un extractor y cuenta el acierto o fallo."""
+    with _cache_parseo_lock:
+        entrada = _cache_parseo.get(digest)
+        if entrada is not None and clave in entrada:
+            _cache_parseo.move_to_end(digest)
+            _estadisticas_parseo['aciertos'] += 1
+            return True, entrada[clave]
+        _estadisticas_parseo['fallos'] += 1
+        return False, None
+
+
+def _guardar_en_cache_parseo(digest, resultados):
+    """Guarda resultados de extractores y descarta las páginas menos usadas."""
+    with _cache_parseo_lock:
+        _cache_parseo.setdefault(digest, {}).update(resultados)
+        _cache_parseo.move_to_end(digest)
+        while len(_cache_parseo) > PARSE_CACHE_SIZE:
+            _cache_parseo.popitem(last=False)
+
+
+def estadisticas_cache_parseo():
+    """
+    Retorna las métricas de la cache de parseo.
+    
+    Returns:
+        dict: Aciertos, fallos, tasa de aciertos, páginas cacheadas y capacidad
+    """
+    with _cache_parseo_lock:
+        aciertos = _estadisticas_parseo['aciertos']
+        fallos = _estadisticas_parseo['fallos']
+        consultas = aciertos + fallos
+        
+        return {
+            'aciertos': aciertos,
+            'fallos': fallos,
+            'tasa_aciertos': round(aciertos / consultas, 3) if consultas else None,
+            'entradas': len(_cache_parseo),
+            'capacidad': PARSE_CACHE_SIZE
+        }
+
+
+def limpiar_cache_parseo():
+    """Vacía la cache de parseo (por ejemplo, tras corregir un extractor)."""
+    with _cache_parseo_lock:
+        _cache_parseo.clear()
+
+
+def parsear_pagina(html):
+    """
+    Extrae el pronóstico general y las estaciones de una página.
+    
+    Los resultados se cachean por el digest del HTML: una página idéntica a
+    una ya procesada cuesta una búsqueda en diccionario. Los objetos
+    retornados se comparten entre llamadas y no deben modificarse.
+    
+    Args:
+        html: Contenido HTML de la página
+        
+    Returns:
+        dict: {'pronostico_general': dict, 'estaciones': list}
+    """
+    digest = calcular_digest(html)
+    resultados = {}
+    faltantes = []
+    
+    for clave in ('pronostico_general', 'estaciones'):
+        encontrado, valor = _buscar_en_cache_parseo(digest, clave)
+        if encontrado:
+            resultados[clave] = valor
+        else:
+            faltantes.append(clave)
+    
+    if faltantes:
+        fragmentos = extraer_fragmentos(html)
+        nuevos = {}
+        if 'pronostico_general' in faltantes:
+            nuevos['pronostico_general'] = _extraer_pronostico_general(fragmentos)
+        if 'estaciones' in faltantes:
+            nuevos['estaciones'] = _extraer_estaciones(fragmentos)
+        _guardar_en_cache_parseo(digest, nuevos)
+        resultados.update(nuevos)
+    
+    return resultados
+
+
+# Elementos de la página principal que usan los extractores
+ID_PRONOSTICO_GENERAL = 'ContentPlaceHolder1_spanPronosticoGeneralTexto'
+PATRON_INICIO_PRONOSTICO = re.compile(
+    r'<span\b[^>]*\bid\s*=\s*["\']?' + ID_PRONOSTICO_GENERAL + r'\b', re.IGNORECASE
+)
+PATRON_ETIQUETA_SPAN = re.compile(r'<(/?)span\b', re.IGNORECASE)
+PATRON_VESTACIONES = re.compile(r'var vEstaciones\s*=\s*\[(.*?)\];', re.DOTALL)
+
+
+def _recortar_span_pronostico(html):
+    """
+    Localiza el span del pronóstico general y retorna solo su HTML.
+    
+    Avanza desde la etiqueta de apertura contando aperturas y cierres de
+    <span> hasta encontrar el cierre que le corresponde.
+    
+    Args:
+        html: Contenido HTML de la página
+        
+    Returns:
+        str: HTML del span (con sus hijos) o None si no está en la página
+    """
+    inicio = PATRON_INICIO_PRONOSTICO.search(html)
+    if not inicio:
+        return None
+    
+    profundidad = 0
+    for etiqueta in PATRON_ETIQUETA_SPAN.finditer(html, inicio.start()):
+        if not etiqueta.group(1):
+            profundidad += 1
+            continue
+        
+        profundidad -= 1
+        if profundidad == 0:
+            fin = html.find('>', etiqueta.end())
+            return html[inicio.start():fin + 1 if fin != -1 else len(html)]
+    
+    return html[inicio.start():]
+
+
+def extraer_fragmentos(html):
+    """
+    Localiza en el HTML las dos partes que interesan a los extractores: el
+    span del pronóstico general y el contenido del array vEstaciones.
+    
+    En lugar de construir el árbol BeautifulSoup de toda la página, se
+    recorta el span con búsquedas de texto y solo ese fragmento se parsea;
+    la regex de vEstaciones arranca directamente donde empieza la variable.
+    
+    Args:
+        html: Contenido HTML de la página
+        
+    Returns:
+        dict: {'pronostico': Tag del span o None,
+               'estaciones_js': contenido entre corchetes de vEstaciones o None}
+    """
+    fragmentos = {
+        'pronostico': None,
+        'estaciones_js': None
+    }
+    
+    html_span = _recortar_span_pronostico(html)
+    if html_span:
+        soup = BeautifulSoup(html_span, 'lxml')
+        fragmentos['pronostico'] = soup.find('span', id=ID_PRONOSTICO_GENERAL)
+    
+    inicio_js = html.find('var vEstaciones')
+    if inicio_js != -1:
+        match = PATRON_VESTACIONES.search(html, inicio_js)
+        if match:
+            fragmentos['estaciones_js'] = match.group(1)
     
-    return response.text
+    return fragmentos
 
 
-def extraer_pronostico_general(html):
+def extraer_pronostico_general(html, fragmentos=None):
     """
     Extrae el pronóstico general de la provincia desde el HTML.
     
+    El resultado se cachea por digest del HTML (ver parsear_pagina).
+    
     Args:
         html: Contenido HTML de la página
+        fragmentos: Resultado de extraer_fragmentos(html), si ya se calculó
         
     Returns:
         dict: Diccionario con el pronóstico estructurado
     """
-    soup = BeautifulSoup(html, 'lxml')
+    digest = calcular_digest(html)
+    encontrado, pronostico = _buscar_en_cache_parseo(digest, 'pronostico_general')
+    
+    if not encontrado:
+        if fragmentos is None:
+            fragmentos = extraer_fragmentos(html)
+        pronostico = _extraer_pronostico_general(fragmentos)
+        _guardar_en_cache_parseo(digest, {'pronostico_general': pronostico})
     
+    return pronostico
+
+
+def _extraer_pronostico_general(fragmentos):
+    """Arma el pronóstico general a partir del span ya localizado."""
     pronostico = {
         'estado_actual': None,
         'pronostico_hoy': None,
@@ -63,7 +408,7 @@ def extraer_pronostico_general(html):
     }
     
     # Buscar el contenedor del pronóstico
-    contenedor = soup.find('span', id='ContentPlaceHolder1_spanPronosticoGeneralTexto')
+    contenedor = fragmentos['pronostico']
     
     if not contenedor:
         logger.warning("No se encontró el contenedor del pronóstico general")
@@ -159,34 +504,8 @@ def procesar_pronostico_hoy(texto):
         'cielo': ''
     }
     
-    # Extraer temperaturas buscando contexto (mínima/máxima)
-    texto_lower = texto.lower()
-    
-    # Buscar temperatura mínima usando contexto
-    minima_match = re.search(r'(?:m[íi]nimas?|m[íi]nima|mín\.|min\.|estarán en torno a los)\s*(?:de|en torno a|serán de)?\s*(\d+)[°ºC]+', texto_lower)
-    if minima_match:
-        pronostico['temperatura_minima'] = int(minima_match.group(1))
-    
-    # Buscar temperatura máxima usando contexto
-    maxima_match = re.search(r'(?:m[áa]ximas?|m[áa]xima|m[áa]x\.|max\.|alcanzarán)\s*(?:de|los|serán de)?\s*(\d+)[°ºC]+', texto_lower)
-    if maxima_match:
-        pronostico['temperatura_maxima'] = int(maxima_match.group(1))
-    
-    # Si no se encontraron con contexto, buscar todas las temperaturas y asignar por orden numérico
-    if pronostico['temperatura_minima'] is None or pronostico['temperatura_maxima'] is None:
-        temp_pattern = r'(\d+)[°ºC]+'
-        temps = re.findall(temp_pattern, texto)
-        if len(temps) >= 2:
-            temp_values = [int(t) for t in temps]
-            # La menor es mínima, la mayor es máxima
-            if pronostico['temperatura_minima'] is None:
-                pronostico['temperatura_minima'] = min(temp_values)
-            if pronostico['temperatura_maxima'] is None:
-                pronostico['temperatura_maxima'] = max(temp_values)
-        elif len(temps) == 1:
-            temp_value = int(temps[0])
-            if pronostico['temperatura_maxima'] is None:
-                pronostico['temperatura_maxima'] = temp_value
+    # Extraer temperaturas (con contexto mínima/máxima o por orden numérico)
+    pronostico['temperatura_minima'], pronostico['temperatura_maxima'] = extraer_temperaturas(texto, 'hoy')
     
     # Procesar líneas
     lineas = texto.split('\n')
@@ -293,27 +612,13 @@ def extraer_pronostico_extendido(texto):
     texto_extendido = texto[extendido_idx:]
     
     # Corregir errores comunes de tipeo en el HTML (ej: "Vienes" -> "Viernes")
-    texto_extendido = re.sub(r'\bVienes\b', 'Viernes', texto_extendido, flags=re.IGNORECASE)
-    texto_extendido = re.sub(r'\bMiercoles\b', 'Miércoles', texto_extendido, flags=re.IGNORECASE)
-    texto_extendido = re.sub(r'\bSabado\b', 'Sábado', texto_extendido, flags=re.IGNORECASE)
-    
-    # Patrón para encontrar días (incluyendo variantes comunes con y sin acentos)
-    dias_pattern = r'(Domingo|Lunes|Martes|Mi[ée]rcoles|Jueves|Viernes|Vienes|S[áa]bado)\s+(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})'
+    texto_extendido = corregir_dias(texto_extendido)
     
-    matches = list(re.finditer(dias_pattern, texto_extendido, re.IGNORECASE))
+    matches = list(PATRON_DIA_EXTENDIDO.finditer(texto_extendido))
     
     for i, match in enumerate(matches):
-        # Normalizar el nombre del día
-        dia_nombre = match.group(1)
-        if dia_nombre.lower() == 'vienes':
-            dia_nombre = 'Viernes'
-        elif dia_nombre.lower() == 'miercoles' or dia_nombre.lower() == 'miércoles':
-            dia_nombre = 'Miércoles'
-        elif dia_nombre.lower() == 'sabado' or dia_nombre.lower() == 'sábado':
-            dia_nombre = 'Sábado'
-        
         dia_info = {
-            'dia': dia_nombre,
+            'dia': normalizar_dia(match.group(1)),
             'fecha': f"{match.group(2)} de {match.group(3)} de {match.group(4)}",
             'descripcion': '',
             'temperatura_minima': None,
@@ -330,104 +635,219 @@ def extraer_pronostico_extendido(texto):
         descripcion = texto_extendido[start:end].strip()
         dia_info['descripcion'] = limpiar_texto(descripcion)
         
-        # Extraer temperaturas buscando contexto (mínima/máxima)
-        descripcion_lower = descripcion.lower()
-        
-        # Buscar temperatura mínima usando contexto
-        minima_match = re.search(r'(?:m[íi]nimas?|m[íi]nima|mín\.|min\.)\s*(?:ser[áa]n?|de|est[áa]n?)?\s*de?\s*(\d+)[°ºC]+', descripcion_lower)
-        if minima_match:
-            dia_info['temperatura_minima'] = int(minima_match.group(1))
-        
-        # Buscar temperatura máxima usando contexto
-        maxima_match = re.search(r'(?:m[áa]ximas?|m[áa]xima|m[áa]x\.|max\.)\s*(?:ser[áa]n?|de|est[áa]n?|alcanzar[áa]n?)?\s*de?\s*(\d+)[°ºC]+', descripcion_lower)
-        if maxima_match:
-            dia_info['temperatura_maxima'] = int(maxima_match.group(1))
-        
-        # Si no se encontraron con contexto, buscar todas las temperaturas y asignar por orden numérico
-        if dia_info['temperatura_minima'] is None or dia_info['temperatura_maxima'] is None:
-            temps = re.findall(r'(\d+)[°ºC]+', descripcion)
-            if len(temps) >= 2:
-                temp_values = [int(t) for t in temps]
-                # La menor es mínima, la mayor es máxima
-                if dia_info['temperatura_minima'] is None:
-                    dia_info['temperatura_minima'] = min(temp_values)
-                if dia_info['temperatura_maxima'] is None:
-                    dia_info['temperatura_maxima'] = max(temp_values)
-            elif len(temps) == 1:
-                temp_value = int(temps[0])
-                # Si solo hay una temperatura, intentar determinar si es mínima o máxima
-                # Si ya tenemos una, usar esta para la otra
-                if dia_info['temperatura_minima'] is None and dia_info['temperatura_maxima'] is not None:
-                    if temp_value < dia_info['temperatura_maxima']:
-                        dia_info['temperatura_minima'] = temp_value
-                elif dia_info['temperatura_maxima'] is None and dia_info['temperatura_minima'] is not None:
-                    if temp_value > dia_info['temperatura_minima']:
-                        dia_info['temperatura_maxima'] = temp_value
+        # Extraer temperaturas (con contexto mínima/máxima o por orden numérico)
+        dia_info['temperatura_minima'], dia_info['temperatura_maxima'] = extraer_temperaturas(descripcion, 'extendido')
         
         pronosticos.append(dia_info)
     
     return pronosticos
 
 
-def extraer_estaciones_desde_js(html):
+def extraer_tabla_estaciones(html, fragmentos=None):
     """
-    Extrae los datos de las estaciones meteorológicas desde el JavaScript.
+    Extrae las estaciones del array vEstaciones como tabla columnar.
     
     Args:
         html: Contenido HTML de la página
+        fragmentos: Resultado de extraer_fragmentos(html), si ya se calculó
         
     Returns:
-        list: Lista de estaciones con sus datos
+        dict: Columna -> lista de valores (ver tokenizador_js.tabla_estaciones),
+            o None si la página no contiene vEstaciones
     """
-    estaciones = []
+    if fragmentos is None:
+        fragmentos = extraer_fragmentos(html)
     
-    # Buscar el array vEstaciones en el JavaScript
-    pattern = r'var vEstaciones\s*=\s*\[(.*?)\];'
-    match = re.search(pattern, html, re.DOTALL)
+    datos_js = fragmentos['estaciones_js']
     
-    if not match:
+    if datos_js is None:
         logger.warning("No se encontraron datos de estaciones")
-        return estaciones
+        return None
     
-    # Procesar cada estación
-    estacion_pattern = r'\[(\d+),"([^"]+)",(-?\d+\.?\d*),(-?\d+\.?\d*),new Date\((\d+)\),([^,]*),([^,]*)'
+    return tabla_estaciones(datos_js)
+
+
+def extraer_estaciones_desde_js(html, fragmentos=None):
+    """
+    Extrae los datos de las estaciones meteorológicas desde el JavaScript.
     
-    for est_match in re.finditer(estacion_pattern, match.group(1)):
-        try:
-            temp = est_match.group(6)
-            temperatura = float(temp) if temp and temp != 'null' else None
-            
-            estacion = {
-                'id': int(est_match.group(1)),
-                'nombre': est_match.group(2),
-                'latitud': float(est_match.group(3)),
-                'longitud': float(est_match.group(4)),
-                'timestamp': int(est_match.group(5)),
-                'temperatura': temperatura,
-                'precipitacion': float(est_match.group(7)) if est_match.group(7) != 'null' else 0.0
-            }
-            estaciones.append(estacion)
-        except (ValueError, IndexError) as e:
-            logger.debug(f"Error procesando estación: {e}")
-            continue
+    El resultado se cachea por digest del HTML (ver parsear_pagina).
+    
+    Args:
+        html: Contenido HTML de la página
+        fragmentos: Resultado de extraer_fragmentos(html), si ya se calculó
+        
+    Returns:
+        list: Lista de estaciones con sus datos
+    """
+    digest = calcular_digest(html)
+    encontrado, estaciones = _buscar_en_cache_parseo(digest, 'estaciones')
+    
+    if not encontrado:
+        if fragmentos is None:
+            fragmentos = extraer_fragmentos(html)
+        estaciones = _extraer_estaciones(fragmentos)
+        _guardar_en_cache_parseo(digest, {'estaciones': estaciones})
     
     return estaciones
 
 
-def obtener_clima():
+def _extraer_estaciones(fragmentos):
+    """Convierte el array vEstaciones ya localizado en lista de estaciones."""
+    tabla = extraer_tabla_estaciones(None, fragmentos)
+    
+    if tabla is None:
+        return []
+    
+    # Solo las columnas con nombre: las columna_N quedan en la tabla y no
+    # forman parte del esquema público hasta que se sepa qué son
+    return filas_como_dicts(tabla)
+
+
+def url_estacion(estacion_id):
+    """
+    Construye la URL de la página de detalle de una estación.
+    
+    Toma URL_ESTACION como plantilla y reemplaza el parámetro "Estacion".
+    
+    Args:
+        estacion_id: ID de la estación (el mismo de vEstaciones)
+        
+    Returns:
+        str: URL de Estacion.aspx para esa estación
+    """
+    partes = urlsplit(URL_ESTACION)
+    parametros = [(k, v) for k, v in parse_qsl(partes.query) if k != 'Estacion']
+    parametros.append(('Estacion', str(estacion_id)))
+    return urlunsplit(partes._replace(query=urlencode(parametros)))
+
+
+def extraer_detalle_estacion(html):
+    """
+    Extrae los valores publicados en la página de detalle de una estación.
+    
+    La página es un formulario ASP.NET: cada dato está en un <span> con id
+    "ContentPlaceHolder1_<campo>". Solo se construye el árbol de esos spans.
+    
+    Args:
+        html: Contenido HTML de Estacion.aspx
+        
+    Returns:
+        dict: Campo -> texto limpio (sin el prefijo ContentPlaceHolder1_)
+    """
+    prefijo = 'ContentPlaceHolder1_'
+    spans = BeautifulSoup(
+        html, 'lxml',
+        parse_only=SoupStrainer('span', id=lambda v: v is not None and v.startswith(prefijo))
+    )
+    
+    detalle = {}
+    for span in spans.find_all('span'):
+        texto = limpiar_texto(span.get_text())
+        if texto:
+            detalle[span['id'][len(prefijo):]] = texto
+    
+    return detalle
+
+
+def obtener_detalles_estaciones(ids, max_workers=None):
+    """
+    Descarga en paralelo las páginas de detalle de varias estaciones.
+    
+    Las descargas comparten la sesión HTTP (pool keep-alive) y la
+    concurrencia queda acotada por max_workers. Las estaciones cuya página
+    falla se omiten del resultado.
+    
+    Args:
+        ids: IDs de estación (por ejemplo, los de extraer_estaciones_desde_js)
+        max_workers: Descargas simultáneas (usa DETALLE_ESTACIONES_WORKERS por defecto)
+        
+    Returns:
+        dict: ID de estación -> detalle extraído
+    """
+    if max_workers is None:
+        max_workers = DETALLE_ESTACIONES_WORKERS
+    
+    # No superar el pool de la sesión para no descartar conexiones
+    max_workers = max(1, min(max_workers, HTTP_POOL_SIZE))
+    
+    def descargar(estacion_id):
+        return extraer_detalle_estacion(obtener_html_detalle(url_estacion(estacion_id)))
+    
+    detalles = {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Cada descarga corre con una copia del contexto actual, así respeta
+        # un bloque sin_espera (un solo intento) del hilo que llama
+        futuros = {
+            executor.submit(contextvars.copy_context().run, descargar, estacion_id): estacion_id
+            for estacion_id in ids
+        }
+        
+        for futuro in as_completed(futuros):
+            estacion_id = futuros[futuro]
+            try:
+                detalles[estacion_id] = futuro.result()
+            except Exception as e:
+                logger.warning(f"No se pudo obtener el detalle de la estación {estacion_id}: {e}")
+    
+    logger.info(f"Detalle obtenido para {len(detalles)}/{len(futuros)} estaciones")
+    return detalles
+
+
+def agregar_detalles(estaciones, detalles):
+    """
+    Combina los detalles descargados con la lista de estaciones.
+    
+    Args:
+        estaciones: Lista de estaciones
+        detalles: Diccionario ID -> detalle (ver obtener_detalles_estaciones)
+        
+    Returns:
+        list: Nueva lista de estaciones con el campo 'detalle' agregado
+    """
+    return [
+        {**estacion, 'detalle': detalles.get(estacion['id'])}
+        for estacion in estaciones
+    ]
+
+
+def obtener_clima(incluir_detalle=None):
     """
     Función principal que obtiene toda la información del clima.
     Si el scraping retorna vacío o falla, carga el último clima guardado.
     
+    Args:
+        incluir_detalle: Si es True, agrega a cada estación los datos de su
+            página Estacion.aspx (usa INCLUIR_DETALLE_ESTACIONES por defecto)
+            
     Returns:
         dict: Diccionario con toda la información meteorológica
     """
+    if incluir_detalle is None:
+        incluir_detalle = INCLUIR_DETALLE_ESTACIONES
+    
+    # Con el circuito abierto no se espera al sitio: respaldo inmediato
+    if circuito_upstream.esta_abierto():
+        logger.warning("Circuito hacia el sitio de clima abierto, usando último clima guardado")
+        return _clima_de_respaldo("Sitio de clima no disponible (circuito abierto)")
+    
     try:
         html = obtener_html()
+        _archivar(html)
+        
+        # Una página idéntica a una ya procesada sale de la cache de parseo
+        pagina = parsear_pagina(html)
+        pronostico_general = pagina['pronostico_general']
+        estaciones = pagina['estaciones']
+        
+        if incluir_detalle and estaciones:
+            detalles = obtener_detalles_estaciones([e['id'] for e in estaciones])
+            estaciones = agregar_detalles(estaciones, detalles)
         
         clima = {
-            'pronostico_general': extraer_pronostico_general(html),
-            'estaciones': extraer_estaciones_desde_js(html),
+            'pronostico_general': pronostico_general,
+            'estaciones': estaciones,
             'exito': True,
             'error': None
         }
@@ -460,71 +880,95 @@ def obtener_clima():
             # Agregar marca de que estos son datos frescos
             clima['usando_cache'] = False
             guardar_ultimo_clima(clima)
+            _registrar_historico(estaciones)
         
         return clima
-        
+    
     except requests.RequestException as e:
         logger.error(f"Error de conexión: {e}")
-        
-        # Intentar cargar el último clima guardado
         logger.info("Intentando cargar último clima guardado debido a error de conexión...")
-        ultimo_clima = cargar_ultimo_clima()
-        
-        if ultimo_clima:
-            logger.info("Usando último clima guardado como respaldo")
-            ultimo_clima['usando_cache'] = True
-            ultimo_clima['error_original'] = str(e)
-            return ultimo_clima
-        
-        # Si no hay clima guardado, retornar error
-        return {
-            'pronostico_general': None,
-            'estaciones': [],
-            'exito': False,
-            'error': str(e),
-            'usando_cache': False
-        }
+        return _clima_de_respaldo(e)
     except Exception as e:
         logger.error(f"Error inesperado: {e}")
-        
-        # Intentar cargar el último clima guardado
         logger.info("Intentando cargar último clima guardado debido a error inesperado...")
-        ultimo_clima = cargar_ultimo_clima()
-        
-        if ultimo_clima:
-            logger.info("Usando último clima guardado como respaldo")
-            ultimo_clima['usando_cache'] = True
-            ultimo_clima['error_original'] = str(e)
-            return ultimo_clima
+        return _clima_de_respaldo(e)
+
+
+def _archivar(html):
+    """
+    Guarda la página descargada en el archivo de páginas. Un error al
+    archivar se loguea pero no hace fallar la obtención del clima.
+    """
+    if not ARCHIVAR_PAGINAS:
+        return
+    
+    try:
+        archivar_pagina(html, URL_CLIMA)
+    except Exception as e:
+        logger.error(f"Error al archivar la página: {e}")
+
+
+def _registrar_historico(estaciones):
+    """
+    Agrega las lecturas de las estaciones al histórico. Un error en la base
+    se loguea pero no hace fallar la obtención del clima.
+    """
+    if not estaciones:
+        return
+    
+    try:
+        registrar_lecturas(estaciones)
+    except Exception as e:
+        logger.error(f"Error al registrar lecturas en el histórico: {e}")
+
+
+def _clima_de_respaldo(error):
+    """
+    Carga el último clima guardado cuando no se pudo obtener uno nuevo.
+    
+    Args:
+        error: Excepción o mensaje que impidió el scraping
         
-        # Si no hay clima guardado, retornar error
-        return {
-            'pronostico_general': None,
-            'estaciones': [],
-            'exito': False,
-            'error': str(e),
-            'usando_cache': False
-        }
+    Returns:
+        dict: Último clima guardado (marcado con usando_cache) o un
+            diccionario de error si no hay ninguno
+    """
+    ultimo_clima = cargar_ultimo_clima()
+    
+    if ultimo_clima:
+        logger.info("Usando último clima guardado como respaldo")
+        ultimo_clima['usando_cache'] = True
+        ultimo_clima['error_original'] = str(error)
+        return ultimo_clima
+    
+    # Si no hay clima guardado, retornar error
+    return {
+        'pronostico_general': None,
+        'estaciones': [],
+        'exito': False,
+        'error': str(error),
+        'usando_cache': False
+    }
 
 
-def buscar_estacion(nombre, estaciones):
+def buscar_estacion(nombre, estaciones, indice=None):
     """
-    Busca una estación por nombre.
+    Busca una estación por nombre, sin distinguir acentos ni mayúsculas y
+    tolerando errores de tipeo.
     
     Args:
         nombre: Nombre de la estación a buscar
         estaciones: Lista de estaciones
-        
+        indice: IndiceNombres ya construido para esa lista (ej: el del
+            snapshot de la API); si no se pasa, se construye uno
+            
     Returns:
-        dict: Datos de la estación encontrada o None
+        dict: Datos de la estación que mejor coincide o None
     """
-    nombre_lower = nombre.lower()
-    
-    for estacion in estaciones:
-        if nombre_lower in estacion['nombre'].lower():
-            return estacion
+    if indice is None:
+        indice = IndiceNombres(estaciones)
     
-    return None
+    return indice.mejor(nombre)
 
 
 # Para pruebas directas
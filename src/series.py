@@ -0,0 +1,391 @@
+import os
+import sqlite3
+import sys
+import threading
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import SERIES_DB
+from src.utils import setup_logger
+from src.tokenizador_js import ZONA_HORARIA_SITIO
+
+logger = setup_logger()
+
+# Una lectura por estación y timestamp del sitio (ms desde epoch). La tabla
+# es WITHOUT ROWID: la clave primaria es el índice agrupado, así que las
+# consultas por estación y rango de tiempo recorren solo las filas pedidas
+# sin importar cuánto histórico haya.
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS lecturas (
+    estacion_id   INTEGER NOT NULL,
+    timestamp     INTEGER NOT NULL,
+    temperatura   REAL,
+    precipitacion REAL,
+    PRIMARY KEY (estacion_id, timestamp)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollups (
+    periodo            TEXT NOT NULL,
+    estacion_id        INTEGER NOT NULL,
+    inicio             INTEGER NOT NULL,
+    n                  INTEGER NOT NULL,
+    n_temperatura      INTEGER NOT NULL,
+    suma_temperatura   REAL NOT NULL,
+    min_temperatura    REAL,
+    max_temperatura    REAL,
+    suma_precipitacion REAL NOT NULL,
+    max_precipitacion  REAL,
+    PRIMARY KEY (periodo, estacion_id, inicio)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS estaciones (
+    id       INTEGER PRIMARY KEY,
+    nombre   TEXT NOT NULL,
+    latitud  REAL,
+    longitud REAL
+);
+"""
+
+# Duración de cada período de agregación, en ms
+PERIODOS = {
+    'hora': 3600 * 1000,
+    'dia': 24 * 3600 * 1000
+}
+
+# Los días se cortan a medianoche en la hora local del sitio
+_DESFASE_SITIO = int(ZONA_HORARIA_SITIO.utcoffset(None).total_seconds() * 1000)
+
+# Versión del cálculo de rollups (PRAGMA user_version); al subirla, las
+# bases existentes se recalculan al abrirlas. 1: la lluvia del período es
+# la suma de incrementos del acumulado, no la suma de lecturas
+VERSION_ROLLUPS = 1
+
+# Suma una lectura al agregado de su período. Todos los campos son
+# conmutativos, así que una lectura atrasada se suma igual que una en orden.
+# MIN/MAX de SQLite con un NULL dan NULL: COALESCE conserva el otro valor.
+_SQL_ACUMULAR = """
+INSERT INTO rollups (
+    periodo, estacion_id, inicio, n, n_temperatura, suma_temperatura,
+    min_temperatura, max_temperatura, suma_precipitacion, max_precipitacion
+) VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (periodo, estacion_id, inicio) DO UPDATE SET
+    n = n + 1,
+    n_temperatura = n_temperatura + excluded.n_temperatura,
+    suma_temperatura = suma_temperatura + excluded.suma_temperatura,
+    min_temperatura = COALESCE(MIN(min_temperatura, excluded.min_temperatura), min_temperatura, excluded.min_temperatura),
+    max_temperatura = COALESCE(MAX(max_temperatura, excluded.max_temperatura), max_temperatura, excluded.max_temperatura),
+    suma_precipitacion = suma_precipitacion + excluded.suma_precipitacion,
+    max_precipitacion = COALESCE(MAX(max_precipitacion, excluded.max_precipitacion), max_precipitacion, excluded.max_precipitacion)
+"""
+
+# Corrige la lluvia de un período cuando una lectura atrasada cambia la
+# lectura anterior de otra ya registrada
+_SQL_CORREGIR_LLUVIA = """
+UPDATE rollups SET suma_precipitacion = suma_precipitacion + ?
+WHERE periodo = ? AND estacion_id = ? AND inicio = ?
+"""
+
+_conexiones = threading.local()
+
+
+def conectar(ruta=None):
+    """
+    Retorna la conexión SQLite del hilo actual, creándola si hace falta.
+    
+    La base se abre en modo WAL: las lecturas (API) no bloquean a la
+    escritura del scraper ni entre sí.
+    
+    Args:
+        ruta: Archivo de la base (usa SERIES_DB por defecto)
+        
+    Returns:
+        sqlite3.Connection: Conexión lista para usar
+    """
+    ruta = ruta or SERIES_DB
+    abiertas = getattr(_conexiones, 'por_ruta', None)
+    if abiertas is None:
+        abiertas = _conexiones.por_ruta = {}
+    
+    conexion = abiertas.get(ruta)
+    if conexion is None:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        conexion = sqlite3.connect(ruta, timeout=10)
+        conexion.row_factory = sqlite3.Row
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("PRAGMA synchronous=NORMAL")
+        conexion.executescript(ESQUEMA)
+        abiertas[ruta] = conexion
+        
+        if conexion.execute("PRAGMA user_version").fetchone()[0] < VERSION_ROLLUPS:
+            reconstruir_rollups(ruta)
+            conexion.execute(f"PRAGMA user_version = {VERSION_ROLLUPS}")
+    
+    return conexion
+
+
+def registrar_lecturas(estaciones, ruta=None):
+    """
+    Agrega al histórico las lecturas de una lista de estaciones y las suma
+    a los rollups horarios y diarios (O(1) por lectura).
+    
+    Las lecturas ya registradas (misma estación y timestamp) se ignoran, así
+    que se puede llamar con cada scrape aunque el sitio no haya actualizado.
+    Una lectura atrasada se suma al período de su timestamp. Las estaciones
+    sin timestamp no se registran.
+    
+    Args:
+        estaciones: Lista de estaciones como la retorna obtener_clima
+        ruta: Archivo de la base (usa SERIES_DB por defecto)
+        
+    Returns:
+        int: Cantidad de lecturas nuevas
+    """
+    filas = [
+        (e['id'], e['timestamp'], e.get('temperatura'), e.get('precipitacion'))
+        for e in estaciones
+        if e.get('id') is not None and e.get('timestamp') is not None
+    ]
+    if not filas:
+        return 0
+    
+    conexion = conectar(ruta)
+    with conexion:
+        # Solo las lecturas realmente insertadas se agregan a los rollups:
+        # un duplicado (misma estación y timestamp) no se cuenta dos veces
+        nuevas = []
+        for fila in filas:
+            cursor = conexion.execute(
+                "INSERT OR IGNORE INTO lecturas (estacion_id, timestamp, temperatura, precipitacion) "
+                "VALUES (?, ?, ?, ?)",
+                fila
+            )
+            if cursor.rowcount == 1:
+                nuevas.append(fila + (_registrar_lluvia(conexion, *fila),))
+        
+        conexion.executemany(_SQL_ACUMULAR, _filas_rollup(nuevas))
+        
+        conexion.executemany(
+            "INSERT INTO estaciones (id, nombre, latitud, longitud) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET nombre = excluded.nombre, "
+            "latitud = excluded.latitud, longitud = excluded.longitud",
+            [(e['id'], e.get('nombre') or '', e.get('latitud'), e.get('longitud'))
+             for e in estaciones if e.get('id') is not None]
+        )
+    
+    logger.info(f"Histórico: {len(nuevas)} lecturas nuevas de {len(filas)}")
+    return len(nuevas)
+
+
+def inicio_periodo(timestamp, periodo):
+    """
+    Inicio del período (hora o día local del sitio) que contiene un timestamp.
+    
+    Args:
+        timestamp: Timestamp en ms desde epoch
+        periodo: 'hora' o 'dia'
+        
+    Returns:
+        int: Timestamp en ms del inicio del período
+    """
+    duracion = PERIODOS[periodo]
+    return timestamp - (timestamp + _DESFASE_SITIO) % duracion
+
+
+def _lluvia_entre(anterior, actual):
+    """
+    Lluvia caída entre dos lecturas consecutivas de precipitación
+    acumulada: el incremento, o todo el valor actual si el acumulado bajó
+    (el sitio lo reinició). Sin lectura anterior no se sabe desde cuándo
+    acumula, así que no se cuenta.
+    """
+    if anterior is None or actual is None:
+        return 0.0
+    return actual - anterior if actual >= anterior else actual
+
+
+def _registrar_lluvia(conexion, estacion_id, timestamp, temperatura, precipitacion):
+    """
+    Lluvia de una lectura recién insertada respecto de la anterior de su
+    estación. Si hay una lectura posterior (la nueva llegó atrasada), se
+    corrige en los rollups la lluvia de esa lectura, que ahora se mide
+    desde la nueva.
+    
+    Returns:
+        float: Lluvia a sumar al período de la lectura
+    """
+    if precipitacion is None:
+        return 0.0
+    
+    fila = conexion.execute(
+        "SELECT precipitacion FROM lecturas WHERE estacion_id = ? AND timestamp < ? "
+        "AND precipitacion IS NOT NULL ORDER BY timestamp DESC LIMIT 1",
+        (estacion_id, timestamp)
+    ).fetchone()
+    anterior = fila[0] if fila is not None else None
+    
+    siguiente = conexion.execute(
+        "SELECT timestamp, precipitacion FROM lecturas WHERE estacion_id = ? AND timestamp > ? "
+        "AND precipitacion IS NOT NULL ORDER BY timestamp LIMIT 1",
+        (estacion_id, timestamp)
+    ).fetchone()
+    if siguiente is not None:
+        correccion = (_lluvia_entre(precipitacion, siguiente[1])
+                      - _lluvia_entre(anterior, siguiente[1]))
+        if correccion:
+            conexion.executemany(_SQL_CORREGIR_LLUVIA, [
+                (correccion, periodo, estacion_id, inicio_periodo(siguiente[0], periodo))
+                for periodo in PERIODOS
+            ])
+    
+    return _lluvia_entre(anterior, precipitacion)
+
+
+def _filas_rollup(lecturas):
+    """
+    Parámetros de _SQL_ACUMULAR para cada lectura y cada período. Cada
+    lectura es (estacion_id, timestamp, temperatura, precipitacion, lluvia).
+    """
+    for estacion_id, timestamp, temperatura, precipitacion, lluvia in lecturas:
+        for periodo in PERIODOS:
+            yield (
+                periodo, estacion_id, inicio_periodo(timestamp, periodo),
+                0 if temperatura is None else 1,
+                temperatura or 0.0, temperatura, temperatura,
+                lluvia, precipitacion
+            )
+
+
+def consultar_lecturas(estacion_id, desde=None, hasta=None, limite=None, ruta=None):
+    """
+    Lecturas de una estación en un rango de tiempo, de la más vieja a la
+    más nueva.
+    
+    Args:
+        estacion_id: ID de la estación
+        desde: Timestamp mínimo en ms (inclusive)
+        hasta: Timestamp máximo en ms (inclusive)
+        limite: Cantidad máxima de lecturas (las más recientes del rango)
+        ruta: Archivo de la base (usa SERIES_DB por defecto)
+        
+    Returns:
+        list: Diccionarios con timestamp, temperatura y precipitacion
+    """
+    consulta = (
+        "SELECT timestamp, temperatura, precipitacion FROM lecturas "
+        "WHERE estacion_id = ? AND timestamp >= ? AND timestamp <= ? "
+        "ORDER BY timestamp DESC"
+    )
+    parametros = [estacion_id, desde if desde is not None else -2**63, hasta if hasta is not None else 2**63 - 1]
+    if limite is not None:
+        consulta += " LIMIT ?"
+        parametros.append(limite)
+    
+    filas = conectar(ruta).execute(consulta, parametros).fetchall()
+    return [dict(fila) for fila in reversed(filas)]
+
+
+def ultima_lectura(estacion_id, ruta=None):
+    """
+    Última lectura registrada de una estación.
+    
+    Args:
+        estacion_id: ID de la estación
+        ruta: Archivo de la base (usa SERIES_DB por defecto)
+        
+    Returns:
+        dict: Lectura más reciente o None si no hay histórico
+    """
+    lecturas = consultar_lecturas(estacion_id, limite=1, ruta=ruta)
+    return lecturas[0] if lecturas else None
+
+
+def consultar_rollups(estacion_id, periodo='hora', desde=None, hasta=None, ruta=None):
+    """
+    Agregados horarios o diarios de una estación.
+    
+    El sitio publica la precipitación acumulada del día: 'precipitacion_total'
+    es la lluvia caída en el período, la suma de los incrementos positivos
+    entre lecturas consecutivas (un acumulado que baja es un reinicio y
+    cuenta entero); 'precipitacion_maxima' es el mayor acumulado leído.
+    
+    Args:
+        estacion_id: ID de la estación
+        periodo: 'hora' o 'dia'
+        desde: Timestamp mínimo en ms del inicio del período (inclusive)
+        hasta: Timestamp máximo en ms del inicio del período (inclusive)
+        ruta: Archivo de la base (usa SERIES_DB por defecto)
+        
+    Returns:
+        list: Diccionarios por período, del más viejo al más nuevo
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f"Período desconocido: {periodo} (se espera {', '.join(PERIODOS)})")
+    
+    filas = conectar(ruta).execute(
+        "SELECT inicio, n, n_temperatura, suma_temperatura, min_temperatura, max_temperatura, "
+        "suma_precipitacion, max_precipitacion FROM rollups "
+        "WHERE periodo = ? AND estacion_id = ? AND inicio >= ? AND inicio <= ? ORDER BY inicio",
+        (periodo, estacion_id,
+         desde if desde is not None else -2**63, hasta if hasta is not None else 2**63 - 1)
+    ).fetchall()
+    
+    return [
+        {
+            'inicio': fila['inicio'],
+            'lecturas': fila['n'],
+            'temperatura_minima': fila['min_temperatura'],
+            'temperatura_maxima': fila['max_temperatura'],
+            'temperatura_media': (round(fila['suma_temperatura'] / fila['n_temperatura'], 2)
+                                  if fila['n_temperatura'] else None),
+            'precipitacion_total': round(fila['suma_precipitacion'], 2),
+            'precipitacion_maxima': fila['max_precipitacion']
+        }
+        for fila in filas
+    ]
+
+
+def reconstruir_rollups(ruta=None):
+    """
+    Recalcula todos los rollups desde las lecturas crudas.
+    
+    No hace falta en el uso normal (registrar_lecturas los mantiene al día);
+    sirve para bases creadas antes de existir los rollups o tras corregir
+    lecturas a mano.
+    
+    Args:
+        ruta: Archivo de la base (usa SERIES_DB por defecto)
+        
+    Returns:
+        int: Cantidad de lecturas procesadas
+    """
+    conexion = conectar(ruta)
+    with conexion:
+        conexion.execute("DELETE FROM rollups")
+        total = 0
+        # En el orden de la clave primaria: cada lectura sigue a la anterior
+        # de su estación, así la lluvia se calcula recorriendo una vez
+        cursor = conexion.execute(
+            "SELECT estacion_id, timestamp, temperatura, precipitacion FROM lecturas "
+            "ORDER BY estacion_id, timestamp"
+        )
+        estacion_anterior, anterior = None, None
+        while True:
+            lote = cursor.fetchmany(5000)
+            if not lote:
+                break
+            
+            lecturas = []
+            for estacion_id, timestamp, temperatura, precipitacion in lote:
+                if estacion_id != estacion_anterior:
+                    estacion_anterior, anterior = estacion_id, None
+                lecturas.append((estacion_id, timestamp, temperatura, precipitacion,
+                                 _lluvia_entre(anterior, precipitacion)))
+                if precipitacion is not None:
+                    anterior = precipitacion
+            
+            conexion.executemany(_SQL_ACUMULAR, _filas_rollup(lecturas))
+            total += len(lote)
+    
+    logger.info(f"Rollups reconstruidos a partir de {total} lecturas")
+    return total
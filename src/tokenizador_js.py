@@ -0,0 +1,287 @@
+import json
+import math
+import re
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+
+# Hora oficial de San Luis (UTC-3, sin horario de verano), usada para
+# interpretar new Date(año, mes, día, ...) con componentes
+ZONA_HORARIA_SITIO = timezone(timedelta(hours=-3))
+
+# Columnas conocidas de cada fila de vEstaciones, en orden
+COLUMNAS_ESTACIONES = (
+    'id', 'nombre', 'latitud', 'longitud', 'timestamp', 'temperatura', 'precipitacion'
+)
+
+# Espacios, comas y caracteres sueltos no forman token: finditer los saltea
+_TOKEN = re.compile(r'''
+    (?P<fecha>new\s+Date\s*\()
+  | (?P<llamada>(?:new\s+)?[A-Za-z_$][\w$.]*\s*\()
+  | (?P<numero>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<cadena>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<literal>null|true|false|undefined)\b
+  | (?P<identificador>[A-Za-z_$][\w$.]*)
+  | (?P<puntuacion>[\[\]()])
+''', re.VERBOSE | re.DOTALL)
+
+_LITERALES = {'null': None, 'undefined': None, 'true': True, 'false': False}
+
+
+def _redondeo_js(x):
+    # Math.round de JavaScript redondea las mitades hacia arriba (-2.5 -> -2)
+    return math.floor(x + 0.5)
+
+
+# Funciones numéricas que pueden aparecer en el array (Math.round(3.4)); el
+# resto de las llamadas valen None. En ambos casos la llamada ocupa una
+# sola columna
+_FUNCIONES = {
+    'Math.round': _redondeo_js,
+    'Math.floor': math.floor,
+    'Math.ceil': math.ceil,
+    'Math.abs': abs,
+    'Number': lambda x: x,
+    'parseFloat': float,
+    'parseInt': int,
+}
+
+
+def _valor_cadena(token):
+    """Decodifica un string JavaScript entre comillas simples o dobles."""
+    if token[0] == "'":
+        token = '"' + token[1:-1].replace("\\'", "'").replace('"', '\\"') + '"'
+    try:
+        return json.loads(token)
+    except ValueError:
+        return token[1:-1]
+
+
+def _valor_fecha(argumentos):
+    """
+    Convierte los argumentos de new Date(...) a milisegundos desde epoch.
+    
+    new Date(ms) se respeta tal cual; new Date(año, mes, día, ...) usa mes
+    base 0, como en JavaScript, y la hora local del sitio.
+    """
+    numeros = [a for a in argumentos if _es_numero(a)]
+    if len(numeros) == 1:
+        return int(numeros[0])
+    if len(numeros) >= 2:
+        componentes = [int(n) for n in numeros[:7]]
+        componentes += [1 if len(componentes) < 3 else 0] * (3 - len(componentes))
+        año, mes, dia = componentes[0], componentes[1] + 1, componentes[2]
+        resto = componentes[3:] + [0] * (4 - len(componentes[3:]))
+        try:
+            fecha = datetime(año, mes, dia, resto[0], resto[1], resto[2], resto[3] * 1000,
+                             tzinfo=ZONA_HORARIA_SITIO)
+        except ValueError:
+            return None
+        return int(fecha.timestamp() * 1000)
+    return None
+
+
+def _valor_llamada(nombre, argumentos):
+    """Evalúa una llamada de _FUNCIONES con un argumento numérico; si no, None."""
+    funcion = _FUNCIONES.get(nombre)
+    if funcion is None or not argumentos or not _es_numero(argumentos[0]):
+        return None
+    return funcion(argumentos[0])
+
+
+def _valor_numero(token):
+    if any(c in token for c in '.eE'):
+        return float(token)
+    return int(token)
+
+
+def iterar_filas(texto):
+    """
+    Recorre un literal de array JavaScript y produce sus filas una a una.
+    
+    Acepta tanto el array completo ("[[...],[...]]") como solo su contenido
+    ("[...],[...]"), que es lo que captura extraer_fragmentos. Entiende
+    números, strings con escapes, null/true/false/undefined,
+    new Date(...) y llamadas como Math.round(3.4), que se evalúan si son
+    de _FUNCIONES; cualquier otro identificador o llamada se toma como
+    None, ocupando siempre una sola columna. Una fila es cada array de
+    primer nivel, sin importar cuántas columnas tenga.
+    
+    Args:
+        texto: Código JavaScript del array
+        
+    Yields:
+        list: Valores de cada fila
+    """
+    # Con el array completo, las filas están un nivel por debajo del exterior
+    nivel_filas = 1 if texto.lstrip().startswith('[[') else 0
+    pila = []
+    # (nivel en la pila, función que convierte los argumentos) de cada
+    # new Date(...) o llamada abierta
+    llamadas = []
+    
+    for match in _TOKEN.finditer(texto):
+        tipo = match.lastgroup
+        token = match.group()
+        
+        if tipo == 'fecha':
+            llamadas.append((len(pila), _valor_fecha))
+            pila.append([])
+            continue
+        
+        if tipo == 'llamada':
+            nombre = token[:-1].split()[-1]
+            llamadas.append((len(pila), partial(_valor_llamada, nombre)))
+            pila.append([])
+            continue
+        
+        if tipo == 'puntuacion':
+            if token in '[(':
+                pila.append([])
+                continue
+            
+            # ']' o ')': cerrar el contenedor actual
+            if not pila:
+                continue
+            
+            valores = pila.pop()
+            if llamadas and llamadas[-1][0] == len(pila):
+                valor = llamadas.pop()[1](valores)
+            elif len(pila) == nivel_filas:
+                yield valores
+                continue
+            else:
+                valor = valores
+            
+            if pila:
+                pila[-1].append(valor)
+            continue
+        
+        if not pila:
+            continue
+        
+        if tipo == 'numero':
+            pila[-1].append(_valor_numero(token))
+        elif tipo == 'cadena':
+            pila[-1].append(_valor_cadena(token))
+        elif tipo == 'literal':
+            pila[-1].append(_LITERALES[token])
+        else:
+            pila[-1].append(None)
+
+
+def _es_numero(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+def _a_float(valor):
+    return float(valor) if _es_numero(valor) else None
+
+
+def tabla_estaciones(texto):
+    """
+    Convierte el array vEstaciones en una tabla columnar.
+    
+    En lugar de un diccionario por estación, se arma una lista por columna
+    (todas de igual longitud: la posición i de cada lista es la estación i).
+    Las columnas que el sitio agregue después de las conocidas quedan en la
+    tabla como 'columna_7', 'columna_8', etc.; filas_como_dicts no las
+    incluye salvo que se pidan. Las filas sin id o nombre válido se
+    descartan.
+    
+    Args:
+        texto: Código JavaScript del array (ver iterar_filas)
+        
+    Returns:
+        dict: Nombre de columna -> lista de valores
+    """
+    tabla = {columna: [] for columna in COLUMNAS_ESTACIONES}
+    total = 0
+    
+    for fila in iterar_filas(texto):
+        if not isinstance(fila, list) or len(fila) < 2:
+            continue
+        
+        estacion_id, nombre = fila[0], fila[1]
+        if not _es_numero(estacion_id) or not isinstance(nombre, str):
+            continue
+        
+        fila = fila + [None] * (len(COLUMNAS_ESTACIONES) - len(fila))
+        precipitacion = _a_float(fila[6])
+        
+        tabla['id'].append(int(estacion_id))
+        tabla['nombre'].append(nombre)
+        tabla['latitud'].append(_a_float(fila[2]))
+        tabla['longitud'].append(_a_float(fila[3]))
+        tabla['timestamp'].append(int(fila[4]) if _es_numero(fila[4]) else None)
+        tabla['temperatura'].append(_a_float(fila[5]))
+        tabla['precipitacion'].append(precipitacion if precipitacion is not None else 0.0)
+        
+        # Columnas adicionales: se crean al aparecer y se rellenan con None
+        for posicion in range(len(COLUMNAS_ESTACIONES), len(fila)):
+            columna = f'columna_{posicion}'
+            if columna not in tabla:
+                tabla[columna] = [None] * total
+            tabla[columna].append(fila[posicion])
+        for columna, valores in tabla.items():
+            if len(valores) == total:
+                valores.append(None)
+        
+        total += 1
+    
+    return tabla
+
+
+def indices_ordenados(tabla, columna, descendente=False, omitir_nulos=True):
+    """
+    Retorna las posiciones de la tabla ordenadas por una columna.
+    
+    Args:
+        tabla: Tabla de tabla_estaciones
+        columna: Nombre de la columna a usar como clave
+        descendente: Orden de mayor a menor
+        omitir_nulos: Excluye las filas cuyo valor es None
+        
+    Returns:
+        list: Índices de fila ordenados
+    """
+    valores = tabla[columna]
+    indices = range(len(valores))
+    if omitir_nulos:
+        indices = [i for i in indices if valores[i] is not None]
+    return sorted(indices, key=valores.__getitem__, reverse=descendente)
+
+
+def filas_como_dicts(tabla, indices=None, columnas=COLUMNAS_ESTACIONES):
+    """
+    Materializa filas de la tabla como diccionarios.
+    
+    Args:
+        tabla: Tabla de tabla_estaciones
+        indices: Posiciones a incluir (todas por defecto)
+        columnas: Columnas a incluir en cada diccionario (por defecto las
+            conocidas, sin las columna_N)
+        
+    Returns:
+        list: Lista de diccionarios, uno por fila
+    """
+    if indices is None:
+        indices = range(len(tabla['id']))
+    listas = [(columna, tabla[columna]) for columna in columnas]
+    return [{columna: valores[i] for columna, valores in listas} for i in indices]
+
+
+def tabla_desde_dicts(filas, columnas=COLUMNAS_ESTACIONES):
+    """
+    Arma una tabla columnar a partir de filas como diccionarios (la inversa
+    de filas_como_dicts), por ejemplo las estaciones de un snapshot leído
+    de la cache.
+    
+    Args:
+        filas: Lista de diccionarios
+        columnas: Columnas de la tabla (las claves ausentes valen None)
+        
+    Returns:
+        dict: Nombre de columna -> lista de valores
+    """
+    return {columna: [fila.get(columna) for fila in filas] for columna in columnas}
@@ -1,10 +1,21 @@
 import logging
+import hashlib
+import contextvars
+import random
+import threading
+import tempfile
 import time
+from contextlib import contextmanager
 from functools import wraps
 from datetime import datetime
 import os
 import sys
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 # Agregar el directorio raíz al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -46,14 +57,281 @@ def setup_logger(name="clima_san_luis"):
     return logger
 
 
-def retry(max_attempts=3, delay=5):
+class CircuitoAbiertoError(Exception):
+    """Se lanza cuando el circuit breaker rechaza una llamada sin intentarla."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker para llamadas a un servicio externo.
+    
+    Estados:
+        'cerrado': las llamadas pasan normalmente.
+        'abierto': tras `umbral_fallos` fallos consecutivos se rechazan las
+            llamadas durante `enfriamiento` segundos, sin esperar al servicio.
+        'semiabierto': pasado el enfriamiento se deja pasar un único intento
+            de prueba; si funciona se cierra, si falla se vuelve a abrir.
+            
+    Args:
+        umbral_fallos: Fallos consecutivos que abren el circuito
+        enfriamiento: Segundos que el circuito permanece abierto
+        nombre: Nombre usado en los logs
+    """
+    
+    def __init__(self, umbral_fallos=3, enfriamiento=120, nombre='upstream'):
+        self.umbral_fallos = umbral_fallos
+        self.enfriamiento = enfriamiento
+        self.nombre = nombre
+        self._lock = threading.Lock()
+        self._fallos = 0
+        self._abierto_desde = None
+        self._prueba_en_curso = False
+    
+    def _estado(self, ahora):
+        if self._abierto_desde is None:
+            return 'cerrado'
+        if ahora - self._abierto_desde < self.enfriamiento:
+            return 'abierto'
+        return 'semiabierto'
+    
+    @property
+    def estado(self):
+        """str: 'cerrado', 'abierto' o 'semiabierto'."""
+        with self._lock:
+            return self._estado(time.monotonic())
+    
+    def esta_abierto(self):
+        """
+        Indica si las llamadas se rechazarían ahora mismo, sin consumir el
+        intento de prueba del estado semiabierto.
+        
+        Returns:
+            bool: True si el circuito está abierto (o semiabierto con una
+                prueba ya en curso)
+        """
+        with self._lock:
+            estado = self._estado(time.monotonic())
+            return estado == 'abierto' or (estado == 'semiabierto' and self._prueba_en_curso)
+    
+    def permite_intento(self):
+        """
+        Decide si una llamada puede intentarse. En estado semiabierto solo el
+        primer llamador obtiene True (el intento de prueba).
+        
+        Returns:
+            bool: True si la llamada puede realizarse
+        """
+        with self._lock:
+            estado = self._estado(time.monotonic())
+            if estado == 'cerrado':
+                return True
+            if estado == 'semiabierto' and not self._prueba_en_curso:
+                self._prueba_en_curso = True
+                return True
+            return False
+    
+    def registrar_exito(self):
+        """Cierra el circuito y reinicia el contador de fallos."""
+        with self._lock:
+            if self._abierto_desde is not None:
+                setup_logger().info(f"Circuito '{self.nombre}' cerrado nuevamente")
+            self._fallos = 0
+            self._abierto_desde = None
+            self._prueba_en_curso = False
+    
+    def liberar_intento(self):
+        """
+        Termina un intento que no fue ni éxito ni fallo del servicio (por
+        ejemplo, un error propio): no cambia el contador ni el estado, solo
+        libera la prueba del estado semiabierto si era esta.
+        """
+        with self._lock:
+            self._prueba_en_curso = False
+    
+    def registrar_fallo(self):
+        """Cuenta un fallo y abre el circuito al alcanzar el umbral."""
+        with self._lock:
+            self._fallos += 1
+            semiabierto = self._prueba_en_curso
+            self._prueba_en_curso = False
+            
+            if semiabierto or self._fallos >= self.umbral_fallos:
+                self._abierto_desde = time.monotonic()
+                setup_logger().warning(
+                    f"Circuito '{self.nombre}' abierto tras {self._fallos} fallos consecutivos. "
+                    f"Se rechazarán llamadas durante {self.enfriamiento} segundos"
+                )
+    
+    def estado_actual(self):
+        """
+        Retorna el estado del circuito para diagnóstico.
+        
+        Returns:
+            dict: Estado, fallos consecutivos y segundos hasta el próximo intento
+        """
+        with self._lock:
+            ahora = time.monotonic()
+            estado = self._estado(ahora)
+            reintento_en = 0
+            if estado == 'abierto':
+                reintento_en = round(self.enfriamiento - (ahora - self._abierto_desde), 1)
+            
+            return {
+                'nombre': self.nombre,
+                'estado': estado,
+                'fallos_consecutivos': self._fallos,
+                'reintento_en': reintento_en
+            }
+
+
+class VueloUnico:
+    """
+    Coalescencia de llamadas concurrentes ("single flight").
+    
+    Mientras una llamada para una clave está en curso, las demás llamadas
+    con la misma clave no la repiten: esperan su resultado o reciben un
+    valor por defecto (por ejemplo, el dato anterior).
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vuelos = {}
+        self._ejecutadas = 0
+        self._coalescidas = 0
+    
+    def ejecutar(self, clave, funcion, esperar=True, por_defecto=None):
+        """
+        Ejecuta funcion() salvo que ya haya una ejecución en curso para la clave.
+        
+        Args:
+            clave: Identifica las llamadas equivalentes
+            funcion: Función sin argumentos a ejecutar
+            esperar: Si es True, una llamada coalescida espera el resultado de
+                la que está en curso (o su excepción); si es False, retorna
+                por_defecto de inmediato
+            por_defecto: Valor para las llamadas coalescidas que no esperan
+            
+        Returns:
+            Resultado de funcion() (propio o de la llamada en curso)
+        """
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelos[clave] = {
+                    'listo': threading.Event(), 'resultado': None, 'error': None
+                }
+                self._ejecutadas += 1
+            else:
+                self._coalescidas += 1
+        
+        if not lider:
+            if not esperar:
+                return por_defecto
+            vuelo['listo'].wait()
+            if vuelo['error'] is not None:
+                raise vuelo['error']
+            return vuelo['resultado']
+        
+        try:
+            vuelo['resultado'] = funcion()
+            return vuelo['resultado']
+        except BaseException as e:
+            vuelo['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._vuelos[clave]
+            vuelo['listo'].set()
+    
+    def estadisticas(self):
+        """
+        Returns:
+            dict: Llamadas ejecutadas, coalescidas y en curso
+        """
+        with self._lock:
+            return {
+                'ejecutadas': self._ejecutadas,
+                'coalescidas': self._coalescidas,
+                'en_curso': len(self._vuelos)
+            }
+
+# Momento límite (time.monotonic) de la llamada con reintentos en curso
+_limite_llamada = contextvars.ContextVar('limite_llamada', default=None)
+
+# Momento límite de un bloque sin_espera (None fuera de uno)
+_limite_sin_espera = contextvars.ContextVar('limite_sin_espera', default=None)
+
+
+@contextmanager
+def sin_espera(segundos):
+    """
+    Dentro del bloque, las funciones decoradas con retry hacen un solo
+    intento, sin dormir, y todas juntas terminan dentro de `segundos`.
+    
+    Es para el camino de un request: el hilo que atiende no queda esperando
+    al servicio externo y, si falla, se usa el respaldo. Los reintentos con
+    backoff quedan para la renovación en segundo plano.
+    
+    Args:
+        segundos: Tiempo total disponible para el bloque
+    """
+    limite = time.monotonic() + segundos
+    externo = _limite_sin_espera.get()
+    if externo is not None:
+        limite = min(limite, externo)
+    token = _limite_sin_espera.set(limite)
+    try:
+        yield
+    finally:
+        _limite_sin_espera.reset(token)
+
+
+def presupuesto_restante(maximo):
+    """
+    Retorna cuántos segundos quedan del deadline de la llamada con
+    reintentos en curso, acotado a `maximo`. Sirve para ajustar el timeout
+    de cada intento y que el último no exceda el deadline total.
+    
+    Args:
+        maximo: Valor a usar si no hay deadline (por ejemplo REQUEST_TIMEOUT)
+        
+    Returns:
+        float: Segundos disponibles (mínimo 1)
+    """
+    limite = _limite_llamada.get()
+    if limite is None:
+        return maximo
+    return max(1, min(maximo, limite - time.monotonic()))
+
+
+def retry(max_attempts=3, delay=5, backoff=2, max_delay=None, jitter=False,
+          deadline=None, breaker=None, reintentar_si=None):
     """
     Decorador para reintentar una función en caso de excepción.
     
+    La espera entre intentos crece exponencialmente (delay * backoff^n,
+    acotada a max_delay) y, con jitter, se elige al azar entre 0 y ese valor
+    para que varios procesos no reintenten al unísono. Si la próxima espera
+    no entra en el deadline total se abandona sin dormir. Dentro de un
+    bloque sin_espera se hace un solo intento, acotado al deadline del bloque.
+    
+    El breaker se consulta una vez por llamada y cuenta un solo fallo
+    cuando se agotan los intentos, no uno por intento.
+    
     Args:
         max_attempts: Número máximo de intentos
-        delay: Segundos de espera entre intentos
-        
+        delay: Segundos de espera antes del primer reintento
+        backoff: Factor multiplicativo de la espera entre intentos
+        max_delay: Espera máxima entre intentos (sin límite si es None)
+        jitter: Si es True, aplica "full jitter" a la espera
+        deadline: Segundos totales permitidos para la llamada (sin límite si es None)
+        breaker: CircuitBreaker opcional; si está abierto se lanza
+            CircuitoAbiertoError sin llamar a la función
+        reintentar_si: Función que recibe la excepción y decide si se
+            reintenta; las excepciones descartadas se relanzan de inmediato
+            y no cambian el estado del breaker
+            
     Returns:
         Decorador configurado
     """
@@ -62,25 +340,64 @@ def retry(max_attempts=3, delay=5):
         def wrapper(*args, **kwargs):
             logger = setup_logger()
             attempts = 0
+            intentos = max_attempts
+            inicio = time.monotonic()
+            limite = inicio + deadline if deadline is not None else None
             
-            while attempts < max_attempts:
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    attempts += 1
-                    if attempts < max_attempts:
-                        logger.warning(
-                            f"Intento {attempts}/{max_attempts} fallido: {e}. "
-                            f"Reintentando en {delay} segundos..."
-                        )
-                        time.sleep(delay)
-                    else:
-                        logger.error(
-                            f"Todos los intentos fallaron ({max_attempts}). "
-                            f"Último error: {e}"
-                        )
-                        raise
+            limite_sin_espera = _limite_sin_espera.get()
+            if limite_sin_espera is not None:
+                intentos = 1
+                limite = limite_sin_espera if limite is None else min(limite, limite_sin_espera)
+            
+            if breaker is not None and not breaker.permite_intento():
+                raise CircuitoAbiertoError(
+                    f"Circuito '{breaker.nombre}' abierto: se omite la llamada a {func.__name__}"
+                )
             
+            token = _limite_llamada.set(limite)
+            
+            try:
+                while True:
+                    try:
+                        resultado = func(*args, **kwargs)
+                    except Exception as e:
+                        if reintentar_si is not None and not reintentar_si(e):
+                            if breaker is not None:
+                                breaker.liberar_intento()
+                            raise
+                        
+                        attempts += 1
+                        
+                        espera = delay * (backoff ** (attempts - 1))
+                        if max_delay is not None:
+                            espera = min(espera, max_delay)
+                        if jitter:
+                            espera = random.uniform(0, espera)
+                        
+                        sin_tiempo = limite is not None and time.monotonic() + espera >= limite
+                        
+                        if attempts < intentos and not sin_tiempo:
+                            logger.warning(
+                                f"Intento {attempts}/{intentos} fallido: {e}. "
+                                f"Reintentando en {espera:.1f} segundos..."
+                            )
+                            time.sleep(espera)
+                        else:
+                            motivo = "Deadline agotado" if sin_tiempo and attempts < intentos else "Todos los intentos fallaron"
+                            logger.error(
+                                f"{motivo} ({attempts}/{intentos}). "
+                                f"Último error: {e}"
+                            )
+                            if breaker is not None:
+                                breaker.registrar_fallo()
+                            raise
+                    else:
+                        if breaker is not None:
+                            breaker.registrar_exito()
+                        return resultado
+            finally:
+                _limite_llamada.reset(token)
+        
         return wrapper
     return decorator
 
@@ -133,12 +450,71 @@ def limpiar_texto(texto):
     return texto.strip()
 
 
-def guardar_ultimo_clima(clima_data):
+def calcular_digest(texto):
+    """
+    Calcula el hash SHA-256 de un texto (por ejemplo, el HTML descargado).
+    
+    Args:
+        texto: Texto a resumir
+        
+    Returns:
+        str: Digest hexadecimal del contenido
+    """
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+# Último snapshot leído o escrito, por ruta: (firma del archivo, datos)
+_snapshots = {}
+_lock_snapshots = threading.Lock()
+_lock_snapshot_escritura = threading.Lock()
+
+
+def _ruta_ultimo_clima(cache_file=None):
+    """Ruta del snapshot (logs/ultimo_clima.json por defecto)."""
+    if cache_file is None:
+        # Directorio para guardar el caché
+        cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+        cache_file = os.path.join(cache_dir, 'ultimo_clima.json')
+    return os.path.abspath(cache_file)
+
+
+def _firma_archivo(estado):
+    """Identifica una versión del archivo: cambia con cada os.replace."""
+    return (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+
+
+@contextmanager
+def _bloqueo_archivo(ruta):
+    """
+    Bloqueo exclusivo entre procesos sobre ruta + '.lock'. En plataformas
+    sin fcntl (Windows) solo se serializan los hilos del proceso.
+    """
+    with _lock_snapshot_escritura:
+        if fcntl is None:
+            yield
+            return
+        
+        with open(ruta + '.lock', 'a') as candado:
+            fcntl.flock(candado, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(candado, fcntl.LOCK_UN)
+
+
+def guardar_ultimo_clima(clima_data, cache_file=None):
     """
     Guarda el último clima exitoso en un archivo JSON.
     
+    La escritura es atómica: se escribe un archivo temporal en el mismo
+    directorio y se reemplaza el snapshot con os.replace, con un bloqueo
+    para que dos procesos no escriban a la vez. Un lector ve siempre el
+    snapshot anterior completo o el nuevo completo. El diccionario recibido
+    no se modifica.
+    
     Args:
         clima_data: Diccionario con los datos del clima
+        cache_file: Ruta del archivo (usa logs/ultimo_clima.json por defecto)
         
     Returns:
         bool: True si se guardó correctamente, False en caso contrario
@@ -146,62 +522,87 @@ def guardar_ultimo_clima(clima_data):
     import json
     
     try:
-        # Directorio para guardar el caché
-        cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
-        os.makedirs(cache_dir, exist_ok=True)
+        cache_file = _ruta_ultimo_clima(cache_file)
+        directorio = os.path.dirname(cache_file)
+        os.makedirs(directorio, exist_ok=True)
         
-        cache_file = os.path.join(cache_dir, 'ultimo_clima.json')
+        # Agregar timestamp (sobre una copia)
+        snapshot = dict(clima_data)
+        snapshot['timestamp_guardado'] = datetime.now().isoformat()
+        contenido = json.dumps(snapshot, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
         
-        # Agregar timestamp
-        clima_data['timestamp_guardado'] = datetime.now().isoformat()
+        with _bloqueo_archivo(cache_file):
+            descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix='.ultimo_clima.', suffix='.tmp')
+            try:
+                with os.fdopen(descriptor, 'wb') as f:
+                    f.write(contenido)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporal, cache_file)
+            except BaseException:
+                os.unlink(temporal)
+                raise
+            
+            firma = _firma_archivo(os.stat(cache_file))
         
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(clima_data, f, ensure_ascii=False, indent=2)
+        with _lock_snapshots:
+            _snapshots[cache_file] = (firma, snapshot)
         
         logger = setup_logger()
         logger.info(f"Último clima guardado en {cache_file}")
         return True
-        
+    
     except Exception as e:
         logger = setup_logger()
         logger.error(f"Error al guardar último clima: {e}")
         return False
 
 
-def cargar_ultimo_clima():
+def cargar_ultimo_clima(cache_file=None):
     """
     Carga el último clima guardado desde el archivo JSON.
     
+    El último snapshot queda en memoria: mientras el archivo no cambie
+    (mismo inodo, mtime y tamaño) solo cuesta un stat. Se retorna una copia
+    superficial, así que el llamador puede agregar o cambiar claves de
+    primer nivel; los objetos anidados son compartidos y no deben
+    modificarse.
+    
+    Args:
+        cache_file: Ruta del archivo (usa logs/ultimo_clima.json por defecto)
+        
     Returns:
         dict: Datos del último clima guardado o None si no existe
     """
     import json
     
     try:
-        cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
-        cache_file = os.path.join(cache_dir, 'ultimo_clima.json')
+        cache_file = _ruta_ultimo_clima(cache_file)
         
-        if not os.path.exists(cache_file):
+        try:
+            firma = _firma_archivo(os.stat(cache_file))
+        except FileNotFoundError:
             return None
         
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            clima_data = json.load(f)
+        with _lock_snapshots:
+            en_memoria = _snapshots.get(cache_file)
+        if en_memoria is not None and en_memoria[0] == firma:
+            return dict(en_memoria[1])
+        
+        with open(cache_file, 'rb') as f:
+            # La firma se toma del archivo abierto: si otro proceso lo
+            # reemplaza entre el stat y el open, se usa la del contenido leído
+            firma = _firma_archivo(os.fstat(f.fileno()))
+            clima_data = json.loads(f.read())
+        
+        with _lock_snapshots:
+            _snapshots[cache_file] = (firma, clima_data)
         
         logger = setup_logger()
         logger.info(f"Último clima cargado desde {cache_file}")
-        return clima_data
-        
+        return dict(clima_data)
+    
     except Exception as e:
         logger = setup_logger()
         logger.error(f"Error al cargar último clima: {e}")
         return None
-
-
-
-
-
-
-
-
-
-
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Script de prueba de la coalescencia de renovaciones ("single flight").
+
+Verifica que, con el dato vencido, muchos hilos que lo piden a la vez
+provoquen una sola llamada a renovar() y que el resto se cuente como
+coalescido.
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src import cache_compartido
+from src.utils import VueloUnico
+
+
+def test_vuelo_unico_comparte_el_resultado():
+    """Las llamadas concurrentes con la misma clave esperan a la que está en curso."""
+    vuelo = VueloUnico()
+    llamadas = []
+    resultados = []
+    barrera = threading.Barrier(8)
+    
+    def lenta():
+        llamadas.append(1)
+        time.sleep(0.3)
+        return 'resultado'
+    
+    def pedir():
+        barrera.wait()
+        resultados.append(vuelo.ejecutar('clave', lenta))
+    
+    hilos = [threading.Thread(target=pedir) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    
+    assert len(llamadas) == 1
+    assert resultados == ['resultado'] * 8
+    assert vuelo.estadisticas() == {'ejecutadas': 1, 'coalescidas': 7, 'en_curso': 0}
+    print("✅ 8 llamadas concurrentes, 1 ejecución y 7 coalescidas")
+
+
+def test_lecturas_vencidas_una_renovacion():
+    """Con el dato vencido, los hilos concurrentes disparan una sola renovación."""
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'cache.db')
+        cache_compartido.publicar('clima', {'exito': True, 'valor': 'viejo'}, ruta)
+        time.sleep(0.2)
+        
+        llamadas = []
+        servidos = []
+        barrera = threading.Barrier(10)
+        
+        def renovar():
+            llamadas.append(1)
+            time.sleep(0.3)
+            return {'exito': True, 'usando_cache': False, 'valor': 'nuevo'}
+        
+        def pedir():
+            barrera.wait()
+            datos, _ = cache_compartido.obtener_o_renovar('clima', renovar, 0.1, 5, ruta=ruta)
+            servidos.append(datos['valor'])
+        
+        antes = cache_compartido.estado_cache('clima', ruta)['renovaciones']['coalescidas']
+        hilos = [threading.Thread(target=pedir) for _ in range(10)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        despues = cache_compartido.estado_cache('clima', ruta)['renovaciones']['coalescidas']
+        
+        assert len(llamadas) == 1
+        # Los que no renuevan reciben el dato anterior sin esperar
+        assert servidos.count('nuevo') >= 1
+        assert set(servidos) <= {'viejo', 'nuevo'}
+        assert despues - antes == servidos.count('viejo')
+    print("✅ 10 lecturas vencidas concurrentes, 1 renovación")
+
+
+if __name__ == "__main__":
+    test_vuelo_unico_comparte_el_resultado()
+    test_lecturas_vencidas_una_renovacion()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Script de prueba de la cache compartida entre procesos (src/cache_compartido).
+
+Verifica que, con el dato vencido, varios procesos que lo leen a la vez
+hagan una sola renovación (el que toma el lease), y que una renovación
+fallida no publique una versión nueva ni rejuvenezca el dato.
+"""
+
+import sys
+import os
+import multiprocessing
+import tempfile
+import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src import cache_compartido
+
+CLAVE = 'clima'
+
+
+def _leer_en_proceso(ruta, registro, vigencia):
+    """Lee el dato desde otro proceso; renovar() deja una línea en el registro."""
+    def renovar():
+        with open(registro, 'a') as f:
+            f.write(f"{os.getpid()}\n")
+        time.sleep(0.5)
+        return {'exito': True, 'usando_cache': False, 'valor': 'nuevo'}
+    
+    cache_compartido.obtener_o_renovar(CLAVE, renovar, vigencia, 5, ruta=ruta)
+
+
+def test_una_renovacion_entre_procesos():
+    """Con el dato vencido, varios procesos a la vez renuevan una sola vez."""
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'cache.db')
+        registro = os.path.join(directorio, 'renovaciones.txt')
+        vigencia = 1
+        
+        cache_compartido.publicar(CLAVE, {'exito': True, 'valor': 'viejo'}, ruta)
+        time.sleep(vigencia + 0.1)
+        
+        contexto = multiprocessing.get_context('fork')
+        procesos = [
+            contexto.Process(target=_leer_en_proceso, args=(ruta, registro, vigencia))
+            for _ in range(4)
+        ]
+        for proceso in procesos:
+            proceso.start()
+        for proceso in procesos:
+            proceso.join(10)
+            assert proceso.exitcode == 0
+        
+        with open(registro) as f:
+            assert len(f.read().split()) == 1
+        
+        version, _, datos = cache_compartido.leer(CLAVE, ruta)
+        assert version == 2
+        assert datos['valor'] == 'nuevo'
+    print("✅ Varios procesos con el dato vencido hacen una sola renovación")
+
+
+def test_renovacion_fallida_no_publica():
+    """Un respaldo o un error no se publican como versión fresca."""
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'cache.db')
+        bueno = {'exito': True, 'usando_cache': False, 'valor': 'bueno'}
+        cache_compartido.publicar(CLAVE, bueno, ruta)
+        time.sleep(0.2)
+        
+        for fallido in ({'exito': True, 'usando_cache': True, 'valor': 'respaldo'},
+                        {'exito': False, 'error': 'sin conexión'}):
+            datos, edad = cache_compartido.obtener_o_renovar(
+                CLAVE, lambda: fallido, 0.1, 5, ruta=ruta
+            )
+            assert datos['valor'] == 'bueno'
+            assert edad >= 0.2
+            assert cache_compartido.leer(CLAVE, ruta)[0] == 1
+    print("✅ Una renovación fallida conserva la versión y la antigüedad")
+
+
+if __name__ == "__main__":
+    test_una_renovacion_entre_procesos()
+    test_renovacion_fallida_no_publica()
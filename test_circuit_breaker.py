@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Script de prueba del circuit breaker y del decorador retry.
+
+Verifica que el circuito se abra tras fallos consecutivos, que pasado el
+enfriamiento deje pasar un solo intento de prueba, y que retry cuente un
+fallo por llamada (no por intento) y no duerma dentro de sin_espera.
+"""
+
+import sys
+import os
+import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.utils import CircuitBreaker, CircuitoAbiertoError, retry, sin_espera
+
+
+class ErrorTransitorio(Exception):
+    """Error que retry reintenta en estas pruebas."""
+
+
+def _funcion_que_falla(breaker, llamadas, max_attempts=3):
+    """Función decorada con retry que siempre falla con un error transitorio."""
+    @retry(max_attempts=max_attempts, delay=0.01, breaker=breaker,
+           reintentar_si=lambda e: isinstance(e, ErrorTransitorio))
+    def fallar(error=ErrorTransitorio):
+        llamadas.append(time.monotonic())
+        raise error("falla simulada")
+    
+    return fallar
+
+
+def test_abre_y_semiabre():
+    """El circuito se abre al umbral, rechaza y tras el enfriamiento prueba una vez."""
+    breaker = CircuitBreaker(umbral_fallos=2, enfriamiento=0.2, nombre='prueba')
+    
+    breaker.registrar_fallo()
+    assert breaker.estado == 'cerrado'
+    breaker.registrar_fallo()
+    assert breaker.estado == 'abierto'
+    assert breaker.esta_abierto()
+    assert not breaker.permite_intento()
+    
+    time.sleep(0.25)
+    assert breaker.estado == 'semiabierto'
+    assert breaker.permite_intento()
+    # Solo un intento de prueba a la vez
+    assert not breaker.permite_intento()
+    assert breaker.esta_abierto()
+    
+    # La prueba falla: vuelve a abrirse por otro enfriamiento
+    breaker.registrar_fallo()
+    assert breaker.estado == 'abierto'
+    
+    time.sleep(0.25)
+    assert breaker.permite_intento()
+    breaker.registrar_exito()
+    assert breaker.estado == 'cerrado'
+    assert breaker.estado_actual()['fallos_consecutivos'] == 0
+    print("✅ El circuito se abre, se semiabre y se cierra tras una prueba exitosa")
+
+
+def test_un_fallo_por_llamada():
+    """Una llamada con todos sus reintentos fallidos cuenta un solo fallo."""
+    breaker = CircuitBreaker(umbral_fallos=3, enfriamiento=60, nombre='prueba')
+    llamadas = []
+    fallar = _funcion_que_falla(breaker, llamadas)
+    
+    for esperados in (1, 2):
+        try:
+            fallar()
+        except ErrorTransitorio:
+            pass
+        assert breaker.estado_actual()['fallos_consecutivos'] == esperados
+        assert breaker.estado == 'cerrado'
+    assert len(llamadas) == 6
+    
+    try:
+        fallar()
+    except ErrorTransitorio:
+        pass
+    assert breaker.estado == 'abierto'
+    
+    # Con el circuito abierto no se llama a la función
+    try:
+        fallar()
+        assert False, "Se esperaba CircuitoAbiertoError"
+    except CircuitoAbiertoError:
+        pass
+    assert len(llamadas) == 9
+    print("✅ retry cuenta un fallo por llamada y respeta el circuito abierto")
+
+
+def test_error_no_transitorio_no_cambia_el_circuito():
+    """Un error que no se reintenta no reinicia los fallos ni cierra el circuito."""
+    breaker = CircuitBreaker(umbral_fallos=2, enfriamiento=0.2, nombre='prueba')
+    llamadas = []
+    fallar = _funcion_que_falla(breaker, llamadas)
+    
+    breaker.registrar_fallo()
+    try:
+        fallar(ValueError)
+    except ValueError:
+        pass
+    assert breaker.estado_actual()['fallos_consecutivos'] == 1
+    
+    breaker.registrar_fallo()
+    time.sleep(0.25)
+    try:
+        fallar(ValueError)
+    except ValueError:
+        pass
+    # Sigue semiabierto y la prueba quedó libre para otro llamador
+    assert breaker.estado == 'semiabierto'
+    assert breaker.permite_intento()
+    print("✅ Un error no transitorio no cierra ni reinicia el circuito")
+
+
+def test_sin_espera_un_solo_intento():
+    """Dentro de sin_espera se hace un solo intento, sin dormir."""
+    breaker = CircuitBreaker(umbral_fallos=3, enfriamiento=60, nombre='prueba')
+    llamadas = []
+    
+    @retry(max_attempts=5, delay=10, breaker=breaker,
+           reintentar_si=lambda e: isinstance(e, ErrorTransitorio))
+    def fallar():
+        llamadas.append(1)
+        raise ErrorTransitorio("falla simulada")
+    
+    inicio = time.monotonic()
+    with sin_espera(2):
+        try:
+            fallar()
+        except ErrorTransitorio:
+            pass
+    
+    assert len(llamadas) == 1
+    assert time.monotonic() - inicio < 1
+    assert breaker.estado_actual()['fallos_consecutivos'] == 1
+    print("✅ sin_espera hace un solo intento sin dormir")
+
+
+if __name__ == "__main__":
+    test_abre_y_semiabre()
+    test_un_fallo_por_llamada()
+    test_error_no_transitorio_no_cambia_el_circuito()
+    test_sin_espera_un_solo_intento()
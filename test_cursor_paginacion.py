@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Script de prueba de la paginación con cursor de /api/estaciones.
+
+Verifica que recorrer las páginas siguiendo siguiente_cursor reproduzca la
+lista completa, y que un cursor de un snapshot anterior se rechace con 410.
+"""
+
+import sys
+import os
+
+# Agregar el directorio raíz y el backend al path
+raiz = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, raiz)
+sys.path.insert(0, os.path.join(raiz, 'backend'))
+
+from app import app
+import routes.api as api
+
+
+def _snapshot(desfase=0.0):
+    """Snapshot de prueba con 23 estaciones (algunas sin temperatura o con lluvia)."""
+    estaciones = [
+        {
+            'id': i,
+            'nombre': f'Estación {i}',
+            'latitud': -33.0 - i / 100,
+            'longitud': -66.0 + i / 100,
+            'timestamp': 1769543940000,
+            'temperatura': None if i % 7 == 0 else round(10 + (i * 37) % 23 + desfase, 1),
+            'precipitacion': 0.2 if i % 3 == 0 else 0.0
+        }
+        for i in range(1, 24)
+    ]
+    return {'pronostico_general': None, 'estaciones': estaciones, 'exito': True, 'error': None}
+
+
+def _pedir(cliente, consulta):
+    respuesta = cliente.get(f'/api/estaciones?{consulta}')
+    return respuesta.status_code, respuesta.get_json()
+
+
+def test_cursor_ida_y_vuelta():
+    """Las páginas unidas son la lista completa, y un cursor vencido da 410."""
+    snapshot = {'actual': _snapshot()}
+    original = api.get_clima_data
+    api.get_clima_data = lambda: snapshot['actual']
+    try:
+        cliente = app.test_client()
+        status, completa = _pedir(cliente, 'fields=id,temperatura')
+        assert status == 200
+        assert completa['siguiente_cursor'] is None
+        
+        ids, cursor, paginas = [], None, 0
+        while True:
+            consulta = 'fields=id,temperatura&limit=5' + (f'&cursor={cursor}' if cursor else '')
+            status, pagina = _pedir(cliente, consulta)
+            assert status == 200
+            assert len(pagina['estaciones']) <= 5
+            ids.extend(e['id'] for e in pagina['estaciones'])
+            paginas += 1
+            cursor = pagina['siguiente_cursor']
+            if cursor is None:
+                break
+        
+        assert ids == [e['id'] for e in completa['estaciones']]
+        assert paginas == -(-completa['total'] // 5)
+        
+        # Un cursor de la primera página deja de valer cuando cambian los datos
+        _, primera = _pedir(cliente, 'limit=5')
+        snapshot['actual'] = _snapshot(desfase=0.5)
+        status, vencido = _pedir(cliente, f"limit=5&cursor={primera['siguiente_cursor']}")
+        assert status == 410
+        assert vencido['exito'] is False
+        
+        # Un cursor ilegible es un error del cliente
+        status, _ = _pedir(cliente, 'limit=5&cursor=no-es-un-cursor')
+        assert status == 400
+    finally:
+        api.get_clima_data = original
+    print("✅ El cursor recorre la lista completa y uno vencido devuelve 410")
+
+
+if __name__ == "__main__":
+    test_cursor_ida_y_vuelta()